@@ -1,24 +1,45 @@
 from __future__ import annotations
 
-import base64
+import atexit
+import bisect
+import functools
+import hashlib
 import io
+import itertools
 import json
 import os
+import secrets
+import shutil
 import subprocess
 import tempfile
+import threading
+import time
 import urllib.parse
-from dataclasses import asdict, dataclass
-from typing import Any, Dict, List, Optional
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, fields
+from typing import Any, Dict, List, Optional, Set, Tuple
 
 import gradio as gr
 from PIL import Image
 
 from shared.utils.plugins import WAN2GPPlugin
 
+try:
+    import av  # PyAV: in-process libav probing, ffprobe is the fallback
+except ImportError:
+    av = None
+
+try:
+    import orjson  # C JSON codec for project (de)serialization, stdlib json is the fallback
+except ImportError:
+    orjson = None
+
 
 # =========================
 # FFprobe helper (audio)
 # =========================
+@functools.lru_cache(maxsize=1)
 def _which_ffprobe() -> str:
     if os.name == "nt":
         for cand in ("ffprobe.exe", "ffprobe"):
@@ -28,7 +49,102 @@ def _which_ffprobe() -> str:
     return "ffprobe"
 
 
+# Probe results survive restarts in a JSON file keyed by "size:mtime_ns:abspath",
+# so re-importing an unchanged file never launches ffprobe again. Gradio stores
+# uploads under a content-hash directory, so a re-upload lands on the same path.
+PROBE_CACHE_PATH = os.path.join(tempfile.gettempdir(), "wan2gp_ffprobe_cache.json")
+
+_probe_cache: Optional[Dict[str, Dict[str, Any]]] = None
+_probe_cache_dirty = False
+_probe_cache_lock = threading.Lock()
+
+
+def _probe_cache_key(path: str) -> Optional[str]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return f"{st.st_size}:{st.st_mtime_ns}:{os.path.abspath(path)}"
+
+
+def _probe_cache_entries() -> Dict[str, Dict[str, Any]]:
+    # caller holds _probe_cache_lock
+    global _probe_cache
+    if _probe_cache is None:
+        try:
+            with open(PROBE_CACHE_PATH, "r", encoding="utf-8") as fh:
+                data = json.load(fh)
+            _probe_cache = data if isinstance(data, dict) else {}
+        except (OSError, ValueError):
+            _probe_cache = {}
+    return _probe_cache
+
+
+def cached_probe(name: str, path: str, probe) -> Any:
+    """Return `probe(path)`, memoized per file version under `name`. Failures (None) are not cached."""
+    global _probe_cache_dirty
+    key = _probe_cache_key(path)
+    if key is None:
+        return probe(path)
+    with _probe_cache_lock:
+        entry = _probe_cache_entries().get(key)
+        if entry is not None and name in entry:
+            return entry[name]
+    value = probe(path)
+    if value is not None:
+        with _probe_cache_lock:
+            _probe_cache_entries().setdefault(key, {})[name] = value
+            _probe_cache_dirty = True
+    return value
+
+
+@atexit.register
+def flush_probe_cache() -> None:
+    global _probe_cache_dirty
+    with _probe_cache_lock:
+        if not _probe_cache_dirty or _probe_cache is None:
+            return
+        tmp_path = None
+        try:
+            fd, tmp_path = tempfile.mkstemp(suffix=".tmp", dir=os.path.dirname(PROBE_CACHE_PATH))
+            with os.fdopen(fd, "w", encoding="utf-8") as fh:
+                json.dump(_probe_cache, fh)
+            os.replace(tmp_path, PROBE_CACHE_PATH)
+            _probe_cache_dirty = False
+        except Exception:
+            if tmp_path is not None:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+
+
+@functools.lru_cache(maxsize=1)
+def probe_executor() -> ThreadPoolExecutor:
+    """Shared pool for media probes (subprocess / I-O bound), created on first use."""
+    return ThreadPoolExecutor(max_workers=8, thread_name_prefix="wan2gp_timeline_probe")
+
+
+def _probe_duration_pyav(path: str) -> Optional[float]:
+    with av.open(path) as container:
+        if container.duration is None:
+            return None
+        return float(container.duration) / av.time_base
+
+
 def probe_audio_duration_seconds(path: str) -> Optional[float]:
+    return cached_probe("duration", path, _probe_audio_duration)
+
+
+def _probe_audio_duration(path: str) -> Optional[float]:
+    if av is not None:
+        try:
+            dur = _probe_duration_pyav(path)
+            if dur is not None:
+                return dur
+        except Exception:
+            pass
+
     ffprobe = _which_ffprobe()
     cmd = [ffprobe, "-v", "error", "-show_format", "-of", "json", path]
     try:
@@ -41,6 +157,17 @@ def probe_audio_duration_seconds(path: str) -> Optional[float]:
         return None
 
 def probe_video_has_audio(path: str) -> bool:
+    return bool(cached_probe("has_audio", path, _probe_video_has_audio))
+
+
+def _probe_video_has_audio(path: str) -> Optional[bool]:
+    if av is not None:
+        try:
+            with av.open(path) as container:
+                return len(container.streams.audio) > 0
+        except Exception:
+            pass
+
     ffprobe = _which_ffprobe()
     cmd = [
         ffprobe, "-v", "error", "-select_streams", "a:0", 
@@ -50,21 +177,29 @@ def probe_video_has_audio(path: str) -> bool:
         p = subprocess.run(cmd, capture_output=True, text=True, check=True)
         return "audio" in p.stdout.lower()
     except Exception:
-        return False
+        return None
 
-def pil_to_data_uri(img: Image.Image, fmt: str = "PNG") -> str:
-    buf = io.BytesIO()
-    if fmt.upper() == "JPEG" and img.mode == "RGBA":
-        img = img.convert("RGB")
-    img.save(buf, format=fmt)
-    b64 = base64.b64encode(buf.getvalue()).decode("utf-8")
-    return f"data:image/{fmt.lower()};base64,{b64}"
+def gradio_file_url(path: str) -> str:
+    return "/gradio_api/file=" + urllib.parse.quote(path)
 
 
 # =========================
 # Project model
 # =========================
-@dataclass
+# Clip/media kinds shown in the program monitor. A frozenset probe uses the
+# string's cached hash instead of comparing against each tuple item.
+VISUAL_KINDS = frozenset(("video", "image"))
+
+# Timeline tracks and the clip kinds each one accepts
+TRACK_KIND = {"V1": "video", "V2": "video", "V3": "video", "A1": "audio", "A2": "audio", "A3": "audio"}
+_TRACK_ACCEPTS = {"video": VISUAL_KINDS, "audio": frozenset(("audio",))}
+
+
+def track_accepts(track_id: Optional[str], clip_kind: str) -> bool:
+    return clip_kind in _TRACK_ACCEPTS.get(TRACK_KIND.get(track_id), ())
+
+
+@dataclass(slots=True)
 class MediaItem:
     id: str
     name: str
@@ -75,9 +210,10 @@ class MediaItem:
     duration_s: Optional[float] = None
     has_audio: Optional[bool] = None
     url: Optional[str] = None
+    thumb_cell: Optional[int] = None  # cell index in Project.thumb_sprite
 
 
-@dataclass
+@dataclass(slots=True)
 class Clip:
     id: str
     media_id: str
@@ -89,7 +225,7 @@ class Clip:
     link_id: Optional[str] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class Project:
     fps: float
     px_per_frame: float
@@ -97,6 +233,16 @@ class Project:
     selected_clip_id: Optional[str]
     media: List[MediaItem]
     clips: List[Clip]
+    thumb_sprite: Optional[str] = None  # URL of the media bin thumbnail sprite sheet
+
+    # Derived indices (never serialized: underscore fields are skipped by dumps_project)
+    _media_by_id: Dict[str, MediaItem] = field(init=False, repr=False, compare=False)
+    _clips_by_id: Dict[str, Clip] = field(init=False, repr=False, compare=False)
+    _timeline: Optional[TimelineIndex] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        # id -> item indices; kept in sync by the add_/remove_ helpers below
+        reindex_project(self)
 
 
 def default_project() -> Project:
@@ -111,12 +257,28 @@ def default_project() -> Project:
     )
 
 
+def loads_json(raw: str) -> Any:
+    return orjson.loads(raw) if orjson is not None else json.loads(raw)
+
+
+# Serialized field names; all values are flat scalars, so a shallow dict is enough
+_PROJECT_FIELDS = tuple(f.name for f in fields(Project) if not f.name.startswith("_"))
+_MEDIA_FIELDS = tuple(f.name for f in fields(MediaItem))
+_CLIP_FIELDS = tuple(f.name for f in fields(Clip))
+
+
 def dumps_project(p: Project) -> str:
-    return json.dumps(asdict(p), ensure_ascii=False)
+    if orjson is not None:
+        # orjson walks dataclass fields natively (skipping "_" fields): no asdict() deep copy
+        return orjson.dumps(p).decode("utf-8")
+    d = {name: getattr(p, name) for name in _PROJECT_FIELDS}
+    d["media"] = [{name: getattr(m, name) for name in _MEDIA_FIELDS} for m in p.media]
+    d["clips"] = [{name: getattr(c, name) for name in _CLIP_FIELDS} for c in p.clips]
+    return json.dumps(d, ensure_ascii=False, separators=(",", ":"))
 
 
 def loads_project(raw: str) -> Project:
-    d = json.loads(raw) if raw else {}
+    d = loads_json(raw) if raw else {}
     media = [MediaItem(**m) for m in d.get("media", [])]
     clips = [Clip(**c) for c in d.get("clips", [])]
     return Project(
@@ -126,36 +288,80 @@ def loads_project(raw: str) -> Project:
         selected_clip_id=d.get("selected_clip_id"),
         media=media,
         clips=clips,
+        thumb_sprite=d.get("thumb_sprite"),
     )
 
 
+_patch_seq = itertools.count(1)
+
+# Ids only need to be unique: a per-process random prefix plus a counter
+# avoids an os.urandom syscall for every new clip.
+_id_prefix = secrets.token_hex(4)
+_id_counter = itertools.count()
+
+
+def new_id(kind: str) -> str:
+    return f"{kind}_{_id_prefix}{next(_id_counter):x}"
+
+
+def project_patch(clips: Optional[List[Clip]] = None, **changes: Any) -> str:
+    """Field-level update for the browser's copy of the project (sent instead of the full JSON).
+    `clips` are replaced by id, so a patch never carries (and can't revert) clips it didn't edit.
+    The sequence number makes repeated identical patches distinguishable on the client."""
+    return json.dumps({
+        "seq": next(_patch_seq),
+        "set": changes,
+        "clips": [{name: getattr(c, name) for name in _CLIP_FIELDS} for c in clips or ()],
+    })
+
+
+def reindex_project(p: Project) -> None:
+    p._media_by_id = {m.id: m for m in p.media}
+    p._clips_by_id = {c.id: c for c in p.clips}
+    p._timeline = None
+
+
+def add_media(p: Project, items: List[MediaItem]) -> None:
+    p.media.extend(items)
+    p._media_by_id.update((m.id, m) for m in items)
+
+
+def add_clips(p: Project, clips: List[Clip]) -> None:
+    p.clips.extend(clips)
+    for c in clips:
+        p._clips_by_id[c.id] = c
+    p._timeline = None
+
+
+def remove_clips(p: Project, clip_ids: Set[str]) -> None:
+    p.clips = [c for c in p.clips if c.id not in clip_ids]
+    for cid in clip_ids:
+        p._clips_by_id.pop(cid, None)
+    p._timeline = None
+
+
+def invalidate_timeline(p: Project) -> None:
+    """Call after editing clip positions/ranges in place (trim, move...)."""
+    p._timeline = None
+
+
 def find_media(p: Project, media_id: str) -> Optional[MediaItem]:
-    for m in p.media:
-        if m.id == media_id:
-            return m
-    return None
+    return p._media_by_id.get(media_id)
 
 
 def find_clip(p: Project, clip_id: Optional[str]) -> Optional[Clip]:
     if not clip_id:
         return None
-    for c in p.clips:
-        if c.id == clip_id:
-            return c
-    return None
+    return p._clips_by_id.get(clip_id)
 
 
 def clip_duration_frames(c: Clip) -> int:
     return max(1, c.out_f - c.in_f)
 
 
-def clip_covers_frame(c: Clip, frame: int) -> bool:
-    dur = clip_duration_frames(c)
-    return c.start_f <= frame < (c.start_f + dur)
-
-
+@functools.lru_cache(maxsize=None)
 def track_priority(track_id: str) -> int:
-    # V3 > V2 > V1, audio ignored for preview
+    # V3 > V2 > V1, audio ignored for preview (memoized: only a handful of track ids exist)
     if track_id.startswith("V"):
         try:
             return int(track_id[1:])
@@ -164,28 +370,274 @@ def track_priority(track_id: str) -> int:
     return -999
 
 
-def _get_preview_image(plugin: "TimelineEditorPlugin", p: Project) -> Optional[Image.Image]:
-    """Helper to get the actual PIL Image for the current playhead frame"""
+class _TrackColumns:
+    """Struct-of-arrays view of one track, rows sorted by start frame."""
+
+    __slots__ = ("starts", "ends", "reach", "orders", "clips")
+
+    def __init__(self, rows: List[Tuple[int, int, int, Clip]]) -> None:
+        rows.sort(key=lambda r: (r[0], r[2]))
+        self.starts = [r[0] for r in rows]
+        self.ends = [r[1] for r in rows]
+        self.orders = [r[2] for r in rows]
+        self.clips = [r[3] for r in rows]
+        # reach[i] = max end frame over rows[:i + 1]
+        self.reach = []
+        max_end = 0
+        for end in self.ends:
+            if end > max_end:
+                max_end = end
+            self.reach.append(max_end)
+
+
+class TimelineIndex:
+    """
+    Per-track interval index over clips.
+
+    Each track keeps its clips sorted by start frame together with a running
+    max of end frames, so "which clips cover frame f" is a bisect plus a short
+    backwards walk (O(log N + K)) instead of a scan over every clip.
+    """
+
+    def __init__(self, clips: List[Clip]) -> None:
+        by_track: Dict[str, List[Tuple[int, int, int, Clip]]] = {}
+        for order, c in enumerate(clips):
+            start = c.start_f
+            by_track.setdefault(c.track_id, []).append((start, start + clip_duration_frames(c), order, c))
+
+        self._tracks: Dict[str, _TrackColumns] = {
+            track_id: _TrackColumns(rows) for track_id, rows in by_track.items()
+        }
+
+        # Highest priority first (V3 > V2 > V1 > audio)
+        self._track_order = sorted(self._tracks, key=track_priority, reverse=True)
+
+    def top_visual_clip(self, frame: int) -> Optional[Clip]:
+        """Topmost video/image clip under `frame` (first clip wins within a track)."""
+        for track_id in self._track_order:
+            t = self._tracks[track_id]
+            ends, reach, orders, clips = t.ends, t.reach, t.orders, t.clips
+            best = -1
+            # Single fused pass: cover test, kind filter and lowest-order pick,
+            # without materialising the hit list.
+            i = bisect.bisect_right(t.starts, frame) - 1
+            while i >= 0 and reach[i] > frame:
+                if ends[i] > frame and clips[i].kind in VISUAL_KINDS and (best < 0 or orders[i] < orders[best]):
+                    best = i
+                i -= 1
+            if best >= 0:
+                return clips[best]
+        return None
+
+
+def timeline_index(p: Project) -> TimelineIndex:
+    if p._timeline is None:
+        p._timeline = TimelineIndex(p.clips)
+    return p._timeline
+
+
+# =========================
+# Sticky video reader (PyAV)
+# =========================
+# Scrubbing and playback mostly ask for the same video at nearby, increasing
+# frames. Keeping the last container open lets those requests decode forward
+# from where the previous one stopped instead of re-opening and seeking.
+# Idle readers wait in a small pool keyed by path; a decode checks its reader
+# out, so decodes never wait on one another and concurrent sessions don't seek
+# a shared container around. Readers are closed on eviction, after sitting
+# idle, when their media leaves the timeline and at exit.
+VIDEO_READER_FORWARD_FRAMES = 48  # decode forward up to this far, seek beyond
+VIDEO_READER_POOL_SIZE = 4  # idle containers kept open across all sessions
+VIDEO_READER_IDLE_S = 60.0  # close a pooled reader unused for this long
+
+
+class _VideoReader:
+    __slots__ = (
+        "key", "container", "stream", "fps", "time_base", "start_pts", "frames", "last_index", "last_image", "last_used",
+    )
+
+    def __init__(self, key: Tuple[str, int]):
+        self.key = key
+        self.container = av.open(key[0])
+        self.stream = self.container.streams.video[0]
+        self.stream.thread_type = "AUTO"
+        self.fps = float(self.stream.average_rate or self.stream.guessed_rate)
+        self.time_base = float(self.stream.time_base)
+        self.start_pts = self.stream.start_time or 0
+        self.frames = None
+        self.last_index = -1
+        self.last_image: Optional[Image.Image] = None
+        self.last_used = time.monotonic()
+
+    def close(self) -> None:
+        try:
+            self.container.close()
+        except Exception:
+            pass
+
+    def read(self, index: int) -> Optional[Image.Image]:
+        if index == self.last_index and self.last_image is not None:
+            return self.last_image
+        if self.frames is None or index <= self.last_index or index > self.last_index + VIDEO_READER_FORWARD_FRAMES:
+            pts = self.start_pts + int(index / self.fps / self.time_base)
+            self.container.seek(pts, stream=self.stream, backward=True)
+            self.frames = self.container.decode(self.stream)
+        for frame in self.frames:
+            if frame.pts is None:
+                continue
+            i = int(round((frame.pts - self.start_pts) * self.time_base * self.fps))
+            if i >= index:
+                self.last_index = i
+                self.last_image = frame.to_image()
+                return self.last_image
+        self.frames = None  # ran off the end
+        return None
+
+
+_video_readers: "OrderedDict[str, _VideoReader]" = OrderedDict()  # path -> idle reader, oldest first
+_video_readers_lock = threading.Lock()
+
+
+def _checkout_video_reader(key: Tuple[str, int]) -> _VideoReader:
+    now = time.monotonic()
+    with _video_readers_lock:
+        reader = _video_readers.pop(key[0], None)
+        stale = [path for path, r in _video_readers.items() if now - r.last_used > VIDEO_READER_IDLE_S]
+        closing = [_video_readers.pop(path) for path in stale]
+    if reader is not None and reader.key != key:
+        closing.append(reader)  # file replaced under the same path
+        reader = None
+    for r in closing:
+        r.close()
+    return reader if reader is not None else _VideoReader(key)
+
+
+def _checkin_video_reader(reader: _VideoReader) -> None:
+    reader.last_used = time.monotonic()
+    closing = []
+    with _video_readers_lock:
+        other = _video_readers.pop(reader.key[0], None)
+        if other is not None:
+            closing.append(other)  # a concurrent decode of the same file got back first
+        _video_readers[reader.key[0]] = reader
+        while len(_video_readers) > VIDEO_READER_POOL_SIZE:
+            closing.append(_video_readers.popitem(last=False)[1])
+    for r in closing:
+        r.close()
+
+
+@atexit.register
+def close_video_readers(paths: Optional[Set[str]] = None) -> None:
+    """Close the pooled readers for `paths` (all of them when None)."""
+    with _video_readers_lock:
+        if paths is None:
+            closing = list(_video_readers.values())
+            _video_readers.clear()
+        else:
+            closing = [_video_readers.pop(path) for path in paths if path in _video_readers]
+    for r in closing:
+        r.close()
+
+
+def _read_video_frame_pyav(path: str, index: int) -> Optional[Image.Image]:
+    reader = _checkout_video_reader((path, os.stat(path).st_mtime_ns))
+    try:
+        img = reader.read(index)
+    except Exception:
+        reader.close()
+        raise
+    _checkin_video_reader(reader)
+    return img
+
+
+# =========================
+# FFmpeg single-frame fallback
+# =========================
+# When PyAV is missing or fails, one frame is pulled through ffmpeg with the
+# fast-seek form (-ss before -i): it jumps to the keyframe before the target
+# and decodes only from there, instead of reading the stream from the start.
+@functools.lru_cache(maxsize=1)
+def _which_ffmpeg() -> Optional[str]:
+    # Resolved once: without a binary the fallback is skipped outright
+    # rather than failing a subprocess spawn on every preview miss.
+    if os.name == "nt":
+        for cand in ("ffmpeg.exe", "ffmpeg"):
+            if os.path.exists(cand):
+                return cand
+    return shutil.which("ffmpeg")
+
+
+def _read_video_frame_ffmpeg(
+    path: str, index: int, fps: float, max_size: Optional[Tuple[int, int]] = None
+) -> Optional[Image.Image]:
+    ffmpeg = _which_ffmpeg()
+    if ffmpeg is None:
+        return None
+    cmd = [ffmpeg, "-v", "error", "-ss", f"{index / fps:.6f}", "-i", path, "-frames:v", "1"]
+    if max_size:
+        # Scale inside ffmpeg so only a monitor-sized frame crosses the pipe
+        cmd += ["-vf", f"scale={max_size[0]}:{max_size[1]}:force_original_aspect_ratio=decrease"]
+    cmd += ["-f", "image2pipe", "-c:v", "bmp", "-"]
+    try:
+        out = subprocess.run(cmd, capture_output=True, check=True).stdout
+    except Exception:
+        return None
+    if not out:
+        return None
+    img = Image.open(io.BytesIO(out))
+    img.load()
+    return img
+
+
+def _resolve_preview_source(p: Project) -> Optional[Tuple[Clip, MediaItem, int]]:
+    """Topmost visual clip under the playhead, its media and the media-local frame."""
     frame = p.playhead_f
-    candidates = [c for c in p.clips if c.kind in ("video", "image") and clip_covers_frame(c, frame)]
-    if not candidates:
+    top = timeline_index(p).top_visual_clip(frame)
+    if top is None:
         return None
 
-    candidates.sort(key=lambda c: track_priority(c.track_id), reverse=True)
-    top = candidates[0]
     m = find_media(p, top.media_id)
     if not m:
         return None
 
+    media_frame = 0 if top.kind == "image" else int(top.in_f + (frame - top.start_f))
+    return top, m, media_frame
+
+
+def _load_preview_image(
+    plugin: "TimelineEditorPlugin",
+    clip: Clip,
+    m: MediaItem,
+    media_frame: int,
+    max_size: Optional[Tuple[int, int]] = None,
+) -> Optional[Image.Image]:
     try:
-        if top.kind == "image":
-            return Image.open(m.path).convert("RGB")
+        if clip.kind == "image":
+            # Most stills are already RGB; callers convert only when needed
+            # instead of paying an unconditional full-frame copy here.
+            with Image.open(m.path) as img:
+                if max_size:
+                    # Let the JPEG decoder downscale in the DCT domain (1/2..1/8)
+                    # rather than decoding full size and resizing afterwards.
+                    img.draft("RGB", max_size)
+                img.load()  # decode here so a truncated file is a miss, not a crash later
+            return img
 
         # video
-        media_frame = top.in_f + (frame - top.start_f)
+        if av is not None:
+            try:
+                pil_img = _read_video_frame_pyav(m.path, media_frame)
+                if pil_img is not None:
+                    return pil_img
+            except Exception:
+                pass  # fall back to ffmpeg / the host decoder
+        if m.fps:
+            pil_img = _read_video_frame_ffmpeg(m.path, media_frame, m.fps, max_size)
+            if pil_img is not None:
+                return pil_img
         get_frame = getattr(plugin, "get_video_frame", None)
         if callable(get_frame):
-            pil_img = get_frame(m.path, int(media_frame), return_PIL=True)
+            pil_img = get_frame(m.path, media_frame, return_PIL=True)
             if isinstance(pil_img, Image.Image):
                 return pil_img
     except Exception:
@@ -193,45 +645,497 @@ def _get_preview_image(plugin: "TimelineEditorPlugin", p: Project) -> Optional[I
     return None
 
 
+def _get_preview_image(plugin: "TimelineEditorPlugin", p: Project) -> Optional[Image.Image]:
+    """Helper to get the actual PIL Image for the current playhead frame"""
+    src = _resolve_preview_source(p)
+    if src is None:
+        return None
+    return _load_preview_image(plugin, *src)
+
+
+# =========================
+# Preview cache (RAM LRU + disk)
+# =========================
+# Gradio only serves files from its upload/cache dir (or explicit allowed_paths),
+# so previews live under it and are handed to the browser as plain file URLs.
+GRADIO_TEMP_DIR = os.environ.get("GRADIO_TEMP_DIR") or os.path.join(tempfile.gettempdir(), "gradio")
+PREVIEW_CACHE_DIR = os.path.join(GRADIO_TEMP_DIR, "wan2gp_timeline_preview")
+PREVIEW_CACHE_SIZE = 256
+PREVIEW_DISK_CACHE_FILES = 2048  # JPEGs kept on disk; the oldest (by mtime) are pruned beyond this
+PREVIEW_DISK_PRUNE_EVERY = 64  # writes between two prune sweeps of the directory
+PREVIEW_JPEG_QUALITY = 80
+PREVIEW_MAX_SIZE = (960, 540)
+
+# Gradio runs sync handlers on worker threads: the lock only guards the LRU
+# bookkeeping, decode/encode run outside it so concurrent previews overlap
+# (the host's cv2-based get_video_frame releases the GIL while decoding).
+_preview_cache: "OrderedDict[Tuple[str, int, int], str]" = OrderedDict()
+_preview_cache_lock = threading.Lock()
+_preview_disk_writes = itertools.count(1)
+
+
+def _preview_cache_key(m: MediaItem, media_frame: int) -> Tuple[str, int, int]:
+    # mtime guards against a media file being replaced under the same path
+    try:
+        mtime_ns = os.stat(m.path).st_mtime_ns
+    except OSError:
+        mtime_ns = 0
+    return m.path, media_frame, mtime_ns
+
+
+def _preview_cache_file(key: Tuple[str, int, int]) -> str:
+    path, media_frame, mtime_ns = key
+    digest = hashlib.sha1(f"{path}|{mtime_ns}".encode("utf-8")).hexdigest()
+    return os.path.join(PREVIEW_CACHE_DIR, f"{digest}_{media_frame}.jpg")
+
+
+def _preview_cache_get(key: Tuple[str, int, int]) -> Optional[str]:
+    with _preview_cache_lock:
+        url = _preview_cache.get(key)
+        if url is not None:
+            _preview_cache.move_to_end(key)
+            return url
+    path = _preview_cache_file(key)
+    try:
+        os.utime(path)  # a disk hit counts as recent use for pruning
+    except OSError:
+        return None
+    url = gradio_file_url(path)
+    _preview_cache_put(key, url)
+    return url
+
+
+def _preview_cache_put(key: Tuple[str, int, int], url: str) -> None:
+    with _preview_cache_lock:
+        _preview_cache[key] = url
+        _preview_cache.move_to_end(key)
+        while len(_preview_cache) > PREVIEW_CACHE_SIZE:
+            _preview_cache.popitem(last=False)
+
+
+def _preview_cache_store(key: Tuple[str, int, int], img: Image.Image) -> Optional[str]:
+    tmp_path = None
+    try:
+        os.makedirs(PREVIEW_CACHE_DIR, exist_ok=True)
+        dst = _preview_cache_file(key)
+        tmp_fd, tmp_path = tempfile.mkstemp(suffix=".jpg", dir=PREVIEW_CACHE_DIR)
+        with os.fdopen(tmp_fd, "wb") as fh:
+            # baseline 4:2:0 without a Huffman optimisation pass: fastest encode for scrubbing
+            img.save(fh, "JPEG", quality=PREVIEW_JPEG_QUALITY, optimize=False, progressive=False, subsampling=2)
+        os.replace(tmp_path, dst)
+    except Exception:
+        if tmp_path and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return None
+    if next(_preview_disk_writes) % PREVIEW_DISK_PRUNE_EVERY == 0:
+        _prune_preview_disk_cache()
+    return dst
+
+
+def _prune_preview_disk_cache() -> None:
+    """Drop the least recently used JPEGs once the directory holds more than PREVIEW_DISK_CACHE_FILES."""
+    try:
+        with os.scandir(PREVIEW_CACHE_DIR) as it:
+            entries = [(e.stat().st_mtime_ns, e.path) for e in it if e.name.endswith(".jpg")]
+    except OSError:
+        return
+    excess = len(entries) - PREVIEW_DISK_CACHE_FILES
+    if excess <= 0:
+        return
+    # Files behind the RAM LRU's URLs stay: RAM hits don't refresh their mtime
+    with _preview_cache_lock:
+        live = {_preview_cache_file(key) for key in _preview_cache}
+    entries.sort()
+    for _, path in [e for e in entries if e[1] not in live][:excess]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass  # already pruned by a concurrent sweep
+
+
+def _fit_preview(img: Image.Image) -> Image.Image:
+    """Downscale to the monitor size; bilinear is the fast (SIMD on Pillow-SIMD) resize path."""
+    w, h = img.size
+    scale = min(PREVIEW_MAX_SIZE[0] / w, PREVIEW_MAX_SIZE[1] / h)
+    if scale >= 1.0:
+        return img
+    return img.resize((max(1, round(w * scale)), max(1, round(h * scale))), Image.BILINEAR)
+
+
 def compute_preview_uri(plugin: "TimelineEditorPlugin", p: Project) -> str:
     """
     Real preview: choose topmost (highest V-track) video/image clip under playhead and render a frame/image.
+    Returns a Gradio file URL to a JPEG; frames are cached in RAM and on disk keyed by (media path, media frame).
     """
-    img = _get_preview_image(plugin, p)
-    if img:
-        return pil_to_data_uri(img, "PNG")
-    return ""
+    src = _resolve_preview_source(p)
+    if src is None:
+        return ""
+
+    clip, m, media_frame = src
+    key = _preview_cache_key(m, media_frame)
+    url = _preview_cache_get(key)
+    if url is not None:
+        return url
+
+    img = _load_preview_image(plugin, clip, m, media_frame, PREVIEW_MAX_SIZE)
+    if not img:
+        return ""
+    if img.mode != "RGB":
+        img = img.convert("RGB")
+    path = _preview_cache_store(key, _fit_preview(img))
+    if path is None:
+        return ""
+    url = gradio_file_url(path)
+    _preview_cache_put(key, url)
+    return url
 
 
 # =========================
-# Plugin
+# Media bin thumbnails (sprite sheet)
 # =========================
-class TimelineEditorPlugin(WAN2GPPlugin):
-    name = "Wan2GP Timeline Editor"
+# All thumbnails are packed into one JPEG grid; the media pool cards show
+# their cell through CSS background-position, so the browser fetches a
+# single image instead of one per media item.
+THUMB_DIR = os.path.join(GRADIO_TEMP_DIR, "wan2gp_timeline_thumbs")
+THUMB_SIZE = (88, 56)  # inner size of a media pool card preview
+THUMB_SPRITE_COLS = 8
+THUMB_CACHE_SIZE = 256
 
-    def setup_ui(self):
-        self.add_tab(
-            tab_id="timeline_editor_tab",
-            label="Timeline",
-            component_constructor=self.create_ui,
-            position=1,
+# (path, mtime_ns, media frame, size) -> decoded thumbnail, least recently used first
+_thumb_cache: "OrderedDict[Tuple[str, int, int, Tuple[int, int]], Image.Image]" = OrderedDict()
+_thumb_cache_lock = threading.Lock()
+
+
+def _media_thumbnail(plugin: "TimelineEditorPlugin", m: MediaItem, frame: int = 0) -> Optional[Image.Image]:
+    if m.kind not in VISUAL_KINDS:
+        return None
+    try:
+        key = (m.path, os.stat(m.path).st_mtime_ns, frame, THUMB_SIZE)
+    except OSError:
+        return None
+    with _thumb_cache_lock:
+        thumb = _thumb_cache.get(key)
+        if thumb is not None:
+            _thumb_cache.move_to_end(key)
+            return thumb
+
+    try:
+        if m.kind == "image":
+            img = Image.open(m.path)
+            img.draft("RGB", THUMB_SIZE)
+        else:
+            get_frame = getattr(plugin, "get_video_frame", None)
+            if not callable(get_frame):
+                return None
+            img = get_frame(m.path, frame, return_PIL=True)
+            if not isinstance(img, Image.Image):
+                return None
+        thumb = img.convert("RGB")
+        thumb.thumbnail(THUMB_SIZE, Image.BILINEAR)
+    except Exception:
+        return None
+    with _thumb_cache_lock:
+        _thumb_cache[key] = thumb
+        while len(_thumb_cache) > THUMB_CACHE_SIZE:
+            _thumb_cache.popitem(last=False)
+    return thumb
+
+
+def build_thumb_sprite(plugin: "TimelineEditorPlugin", p: Project) -> None:
+    """(Re)build the sprite sheet for `p.media`, assigning each thumbnailed item its cell."""
+    cells = []
+    for m in p.media:
+        m.thumb_cell = None
+        thumb = _media_thumbnail(plugin, m)
+        if thumb is not None:
+            m.thumb_cell = len(cells)
+            cells.append((m, thumb))
+
+    if not cells:
+        p.thumb_sprite = None
+        return
+
+    cw, ch = THUMB_SIZE
+    rows = (len(cells) + THUMB_SPRITE_COLS - 1) // THUMB_SPRITE_COLS
+    sprite = Image.new("RGB", (cw * min(len(cells), THUMB_SPRITE_COLS), ch * rows))
+    for m, thumb in cells:
+        col, row = m.thumb_cell % THUMB_SPRITE_COLS, m.thumb_cell // THUMB_SPRITE_COLS
+        # letterbox inside the cell
+        sprite.paste(thumb, (col * cw + (cw - thumb.width) // 2, row * ch + (ch - thumb.height) // 2))
+
+    # content-addressed name so the browser can cache it for as long as the bin is unchanged
+    sig = "|".join(f"{m.path}:{m.thumb_cell}" for m, _ in cells)
+    path = os.path.join(THUMB_DIR, hashlib.sha1(sig.encode("utf-8")).hexdigest() + ".jpg")
+    try:
+        if not os.path.exists(path):
+            os.makedirs(THUMB_DIR, exist_ok=True)
+            sprite.save(path, "JPEG", quality=80, optimize=False, subsampling=2)
+        p.thumb_sprite = gradio_file_url(path)
+    except Exception:
+        p.thumb_sprite = None
+        for m, _ in cells:
+            m.thumb_cell = None
+
+
+# =========================
+# Timeline commands
+# =========================
+# Each command from the JS bridge is handled by one function in _CMD_TABLE,
+# keyed by its "type". Handlers mutate the project in place and describe
+# what the browser needs back through a CmdResult.
+@dataclass(slots=True)
+class CmdResult:
+    changed: bool = False  # structural edit (add/delete/razor): resend the whole project and preview
+    patch: Optional[Dict[str, Any]] = None  # field update sent instead of the whole project
+    clips: Optional[List[Clip]] = None  # clips edited in place (move/trim), patched by id
+    preview: Optional[str] = None  # preview URI override, project untouched
+    screenshot: Optional[str] = None  # file to hand to the screenshot download
+    reset_layout: bool = False  # no-op drag (move/trim): the UI must drop its optimistic preview
+
+
+def _cmd_set_playhead(plugin: "TimelineEditorPlugin", p: Project, cmd: Dict[str, Any]) -> CmdResult:
+    frame = max(0, int(cmd.get("frame", 0)))
+    if frame == p.playhead_f:
+        return CmdResult()
+    p.playhead_f = frame
+    # Only the playhead moved: patch it instead of resending the project
+    return CmdResult(patch={"playhead_f": frame})
+
+
+def _cmd_preview_at(plugin: "TimelineEditorPlugin", p: Project, cmd: Dict[str, Any]) -> CmdResult:
+    frame = max(0, int(cmd.get("frame", 0)))
+    original_f = p.playhead_f
+    p.playhead_f = frame
+    prev = compute_preview_uri(plugin, p)
+    p.playhead_f = original_f
+    if prev:
+        # Echo the frame so the browser can cache frame -> preview URL
+        prev = f"{prev}#f={frame}"
+    # Project left as-is so client state is not forced to rewind!
+    return CmdResult(preview=prev)
+
+
+def _cmd_screenshot(plugin: "TimelineEditorPlugin", p: Project, cmd: Dict[str, Any]) -> CmdResult:
+    res = CmdResult()
+    frame = cmd.get("frame")
+    if frame is not None and max(0, int(frame)) != p.playhead_f:
+        p.playhead_f = max(0, int(frame))
+        res.patch = {"playhead_f": p.playhead_f}
+
+    img = _get_preview_image(plugin, p)
+    if img:
+        if img.mode not in ("RGB", "RGBA"):
+            img = img.convert("RGB")  # e.g. CMYK JPEGs, which PNG can't hold
+        tmp_fd, tmp_path = tempfile.mkstemp(suffix=".png", prefix="screenshot_")
+        os.close(tmp_fd)
+        img.save(tmp_path, "PNG")
+        res.screenshot = tmp_path
+    return res
+
+
+def _cmd_select_clip(plugin: "TimelineEditorPlugin", p: Project, cmd: Dict[str, Any]) -> CmdResult:
+    if cmd.get("clip_id") == p.selected_clip_id:
+        return CmdResult()
+    p.selected_clip_id = cmd.get("clip_id")
+    return CmdResult(patch={"selected_clip_id": p.selected_clip_id})
+
+
+def _cmd_delete_clip(plugin: "TimelineEditorPlugin", p: Project, cmd: Dict[str, Any]) -> CmdResult:
+    cid = cmd.get("clip_id")
+    target = find_clip(p, cid)
+    if not target:
+        return CmdResult()
+    removed = [c for c in p.clips if c.link_id == target.link_id] if target.link_id else [target]
+    remove_clips(p, {c.id for c in removed})
+    if p.selected_clip_id == cid:
+        p.selected_clip_id = None
+    # Media no clip plays any more has no use for an open decoder
+    unused = {c.media_id for c in removed} - {c.media_id for c in p.clips}
+    close_video_readers({m.path for m in p.media if m.id in unused})
+    return CmdResult(changed=True)
+
+
+def _cmd_add_clip(plugin: "TimelineEditorPlugin", p: Project, cmd: Dict[str, Any]) -> CmdResult:
+    media_id = cmd.get("media_id")
+    track_id = cmd.get("track_id", "V1")
+    start_f = max(0, int(cmd.get("start_f", 0)))
+
+    m = find_media(p, media_id)
+    track_kind = TRACK_KIND.get(track_id)
+    if not m or track_kind is None:
+        return CmdResult()
+    # Validation logic
+    if track_kind == "audio" and m.kind != "audio" and not (m.kind == "video" and m.has_audio):
+        return CmdResult()  # Disallow images or video-without-audio on Audio tracks
+    if track_kind == "video" and m.kind == "audio":
+        return CmdResult()  # Disallow Audio strictly on Video tracks
+
+    if m.frames is not None:
+        dur_f = max(1, int(m.frames))
+        if m.kind == "video":
+            dur_f = min(dur_f, int(round(p.fps * 5.0)))
+    else:
+        dur_f = int(round(p.fps * 2.0))
+
+    clip_id = new_id("c")
+    clips_to_add = []
+
+    if m.kind == "video" and track_kind == "video" and m.has_audio:
+        link_id = new_id("l")
+        cv = Clip(
+            id=clip_id, media_id=m.id, track_id=track_id, start_f=start_f,
+            in_f=0, out_f=dur_f, kind="video", link_id=link_id
+        )
+        ca_id = new_id("c")
+        ca = Clip(
+            id=ca_id, media_id=m.id, track_id="A1", start_f=start_f,
+            in_f=0, out_f=dur_f, kind="audio", link_id=link_id
+        )
+        clips_to_add.extend([cv, ca])
+    elif m.kind == "video" and track_kind == "audio" and m.has_audio:
+        c = Clip(
+            id=clip_id, media_id=m.id, track_id=track_id, start_f=start_f,
+            in_f=0, out_f=dur_f, kind="audio", link_id=None
         )
+        clips_to_add.append(c)
+    else:
+        c = Clip(
+            id=clip_id, media_id=m.id, track_id=track_id, start_f=start_f,
+            in_f=0, out_f=dur_f, kind=m.kind, link_id=None
+        )
+        clips_to_add.append(c)
+
+    add_clips(p, clips_to_add)
+    p.selected_clip_id = clip_id
+    return CmdResult(changed=True)
+
+
+def _cmd_trim_clip(plugin: "TimelineEditorPlugin", p: Project, cmd: Dict[str, Any]) -> CmdResult:
+    cid = cmd.get("clip_id")
+    edge = cmd.get("edge") # "IN" or "OUT"
+    new_frame = max(0, int(cmd.get("new_frame", 0)))
+    
+    target = find_clip(p, cid)
+    if not target:
+        return CmdResult()
+    link_group = [c for c in p.clips if c.link_id == target.link_id] if target.link_id else [target]
+    before = [(c.start_f, c.in_f, c.out_f) for c in link_group]
+    
+    if edge == "IN":
+        delta_start = new_frame - target.start_f
+        for c in link_group:
+            # Keep at least 1 frame duration
+            max_delta = (c.out_f - c.in_f) - 1
+            actual_delta = min(delta_start, max_delta)
+            # Cannot trim before start of media file
+            if c.in_f + actual_delta < 0:
+                actual_delta = -c.in_f
+            # Cannot place before timeline 0
+            if c.start_f + actual_delta < 0:
+                actual_delta = -c.start_f
+                
+            c.start_f += actual_delta
+            c.in_f += actual_delta
+            
+    elif edge == "OUT":
+        new_dur = new_frame - target.start_f
+        for c in link_group:
+            actual_dur = max(1, new_dur)
+            m = find_media(p, c.media_id)
+            if m and m.frames is not None:
+                max_dur = m.frames - c.in_f
+                actual_dur = min(actual_dur, max_dur)
+            c.out_f = c.in_f + actual_dur
+
+    if [(c.start_f, c.in_f, c.out_f) for c in link_group] == before:
+        return CmdResult(reset_layout=True)  # clamped back to where it was
+    invalidate_timeline(p)
+    return CmdResult(clips=link_group)
+
+
+def _cmd_move_clip(plugin: "TimelineEditorPlugin", p: Project, cmd: Dict[str, Any]) -> CmdResult:
+    cid = cmd.get("clip_id")
+    new_start = max(0, int(cmd.get("start_f", 0)))
+    new_track = cmd.get("track_id")
+
+    target = find_clip(p, cid)
+    if not target:
+        return CmdResult()
+    link_group = [c for c in p.clips if c.link_id == target.link_id] if target.link_id else [target]
+    before = [(c.start_f, c.track_id) for c in link_group]
+    delta = new_start - target.start_f
+    if target.link_id:
+        linked_clips = link_group
+        # Cap delta if moving left out of bounds
+        min_start = min(c.start_f for c in linked_clips)
+        if min_start + delta < 0:
+            delta = -min_start
+            
+        for c in linked_clips:
+            c.start_f += delta
+            if c.id == cid and track_accepts(new_track, c.kind):
+                c.track_id = new_track
+    else:
+        target.start_f += delta
+        if track_accepts(new_track, target.kind):
+            target.track_id = new_track
+    if [(c.start_f, c.track_id) for c in link_group] == before:
+        return CmdResult(reset_layout=True)  # dropped where it started
+    invalidate_timeline(p)
+    return CmdResult(clips=link_group)
+
+
+def _cmd_razor_cut(plugin: "TimelineEditorPlugin", p: Project, cmd: Dict[str, Any]) -> CmdResult:
+    cid = cmd.get("clip_id")
+    cut_off = int(cmd.get("cut_offset_f", 0))
+
+    target = find_clip(p, cid)
+    if not target:
+        return CmdResult()
+    dur = clip_duration_frames(target)
+    cut_off = max(1, min(dur - 1, cut_off))
+
+    link_group = [c for c in p.clips if c.link_id == target.link_id] if target.link_id else [target]
+    new_link_id = new_id("l") if target.link_id else None
+
+    for c in link_group:
+        second = Clip(
+            id=new_id("c"),
+            media_id=c.media_id,
+            track_id=c.track_id,
+            start_f=c.start_f + cut_off,
+            in_f=c.in_f + cut_off,
+            out_f=c.out_f,
+            kind=c.kind,
+            link_id=new_link_id
+        )
+        c.out_f = c.in_f + cut_off
+        add_clips(p, [second])
+        
+    p.selected_clip_id = target.id
+    return CmdResult(changed=True)
 
-        # Wan2GP injects requested globals as attributes via setattr(plugin, name, fn)
-        self.request_global("get_unique_id")
-        self.request_global("has_video_file_extension")
-        self.request_global("has_image_file_extension")
-        self.request_global("has_audio_file_extension")
-        self.request_global("get_video_info")   # returns (fps,w,h,frame_count)
-        self.request_global("get_video_frame")  # supports return_PIL=True
 
-        self.request_component("state")
+_CMD_TABLE = {
+    "SET_PLAYHEAD": _cmd_set_playhead,
+    "PREVIEW_AT": _cmd_preview_at,
+    "SCREENSHOT": _cmd_screenshot,
+    "SELECT_CLIP": _cmd_select_clip,
+    "DELETE_CLIP": _cmd_delete_clip,
+    "ADD_CLIP": _cmd_add_clip,
+    "TRIM_CLIP": _cmd_trim_clip,
+    "MOVE_CLIP": _cmd_move_clip,
+    "RAZOR_CUT": _cmd_razor_cut,
+}
 
-    def create_ui(self):
-        mount_container = "<div id='nle-mount'></div>"
 
-        # HTML body definition
-        UI_BODY_HTML = r"""
+# =========================
+# Frontend (static markup + bootstrap JS, built once at import)
+# =========================
+MOUNT_CONTAINER_HTML = "<div id='nle-mount'></div>"
+
+# HTML body definition
+UI_BODY_HTML = r"""
 <main class="flex-1 flex flex-col min-h-0">
     <!-- TOP HALF -->
     <div class="flex h-[55%] min-h-0 border-b panel-border">
@@ -267,6 +1171,7 @@ class TimelineEditorPlugin(WAN2GPPlugin):
                     class="max-w-full max-h-full object-contain absolute inset-0 pointer-events-none opacity-0 transition-opacity duration-200"
                     style="filter: sepia(40%) hue-rotate(-10deg) saturate(150%) contrast(120%);">
                 <div class="absolute inset-0 bg-orange-900/20 mix-blend-overlay pointer-events-none"></div>
+                <div class="absolute top-4 left-1/2 -translate-x-1/2 bg-[#2d8ceb]/90 text-white px-3 py-1 rounded text-xs shadow-lg z-50 transition-opacity duration-500 pointer-events-none" id="nle-toast" style="opacity: 0;"></div>
 
                 <!-- Timecode Overlay -->
                 <div class="absolute top-4 right-4 text-white/50 font-mono text-xl tracking-widest drop-shadow-md pointer-events-none" id="preview-timecode">
@@ -366,13 +1271,13 @@ class TimelineEditorPlugin(WAN2GPPlugin):
                 <div class="flex-1 relative overflow-hidden flex items-end cursor-text" id="time-ruler">
                     <div class="w-[2000px] flex justify-between px-2 text-[9px] text-gray-500 font-mono pb-0.5 select-none pointer-events-none" id="ruler-marks">
                     </div>
-                    <div class="absolute bottom-0 -ml-[7px] w-0 h-0 border-l-[7px] border-r-[7px] border-t-[9px] border-l-transparent border-r-transparent border-t-[#2d8ceb] z-20 cursor-ew-resize" id="playhead-head" style="left: 100px;"></div>
+                    <div class="absolute bottom-0 -ml-[7px] w-0 h-0 border-l-[7px] border-r-[7px] border-t-[9px] border-l-transparent border-r-transparent border-t-[#2d8ceb] z-20 cursor-ew-resize" id="playhead-head" style="left: 0; transform: translateX(100px);"></div>
                 </div>
             </div>
 
             <!-- Tracks Area -->
             <div class="flex-1 flex overflow-auto relative bg-[#181818]" id="timeline-container">
-                <div class="absolute top-0 bottom-0 w-[1px] bg-[#2d8ceb] z-40 pointer-events-none" id="playhead-line" style="left: 260px;"></div>
+                <div class="absolute top-0 bottom-0 w-[1px] bg-[#2d8ceb] z-40 pointer-events-none" id="playhead-line" style="left: 0; transform: translateX(260px);"></div>
                 <div class="razor-line" id="razor-guide"></div>
 
                 <!-- Track headers -->
@@ -436,6 +1341,9 @@ class TimelineEditorPlugin(WAN2GPPlugin):
   .tab-active::after { content: ''; position: absolute; bottom: -6px; left: 0; width: 100%; height: 2px; background-color: #2d8ceb; }
   .text-xxs { font-size: 0.65rem; line-height: 1rem; }
 
+  /* Media pool: cards scrolled out of the pool are not laid out or painted */
+  #media-pool > [data-media-id] { content-visibility: auto; contain-intrinsic-size: auto 96px auto 82px; }
+
   /* Drag highlight */
   .drag-over { background-color: #2a2a2a !important; border: 2px dashed #2d8ceb !important; }
 
@@ -464,12 +1372,13 @@ class TimelineEditorPlugin(WAN2GPPlugin):
 </style>
 """
 
-        # Secure JS injection
-        ui_body_js = json.dumps(UI_BODY_HTML)
+# Secure JS injection (JSON-escaped once at import, not per create_ui call)
+_UI_BODY_JS = json.dumps(UI_BODY_HTML)
 
-        js = rf"""
+UI_JS = rf"""
 function() {{
-  const UI_BODY_HTML = {ui_body_js};
+  const UI_BODY_HTML = {_UI_BODY_JS};
+  const THUMB_W = {THUMB_SIZE[0]}, THUMB_H = {THUMB_SIZE[1]}, THUMB_SPRITE_COLS = {THUMB_SPRITE_COLS};
 
   // ---- utilities ----
   function $(sel, root=document) {{ return root.querySelector(sel); }}
@@ -499,39 +1408,72 @@ function() {{
     try {{ return JSON.parse(s || "{{}}"); }} catch(e) {{ return null; }}
   }}
 
+  // Commands issued within one task are flushed together from a microtask;
+  // a newer command of the same type replaces the queued one (e.g. bursts
+  // of SET_PLAYHEAD during a drag only send the latest frame).
+  const INPUT_EVENT = new Event("input", {{ bubbles: true }});
+  let cmdQueue = [];
+
+  function flushCmds() {{
+    const queue = cmdQueue;
+    cmdQueue = [];
+    for (const {{ el, obj }} of queue) {{
+      el.value = JSON.stringify(obj);
+      el.dispatchEvent(INPUT_EVENT);
+    }}
+  }}
+
   function sendCmd(cmdEl, obj) {{
-    cmdEl.value = JSON.stringify(obj);
-    cmdEl.dispatchEvent(new Event("input", {{ bubbles: true }}));
+    if (cmdQueue.length === 0) queueMicrotask(flushCmds);
+    const last = cmdQueue[cmdQueue.length - 1];
+    if (last && last.el === cmdEl && last.obj.type === obj.type) last.obj = obj;
+    else cmdQueue.push({{ el: cmdEl, obj: obj }});
   }}
 
+  const PAD2 = Array.from({{ length: 100 }}, (_, i) => String(i).padStart(2, "0"));
+  const pad2 = (n) => (n < 100 ? PAD2[n] : String(n));
+
+  // Small frame -> timecode cache: playback and scrubbing keep revisiting
+  // nearby frames at one fps. Cleared wholesale when full.
+  const TC_CACHE_SIZE = 256;
+  const tcCache = new Map();
+
   function frameToTimecode(frame, fps) {{
     const f = Math.max(0, Math.round(frame));
     const fpsI = Math.max(1, Math.round(fps));
+    const key = f * 1024 + fpsI;
+    const hit = tcCache.get(key);
+    if (hit !== undefined) return hit;
     const ff = f % fpsI;
     const totalSeconds = Math.floor(f / fpsI);
     const ss = totalSeconds % 60;
     const totalMinutes = Math.floor(totalSeconds / 60);
     const mm = totalMinutes % 60;
     const hh = Math.floor(totalMinutes / 60);
-    const pad2 = (n) => String(n).padStart(2, "0");
-    return `${{pad2(hh)}}:${{pad2(mm)}}:${{pad2(ss)}}:${{pad2(ff)}}`;
+    const tc = `${{pad2(hh)}}:${{pad2(mm)}}:${{pad2(ss)}}:${{pad2(ff)}}`;
+    if (tcCache.size >= TC_CACHE_SIZE) tcCache.clear();
+    tcCache.set(key, tc);
+    return tc;
   }}
 
   // ---- mount + assets + init ----
   async function ensureAssets() {{
-    await loadCssOnce(
-      "https://fonts.googleapis.com/css2?family=Inter:wght@400;500;600&display=swap",
-      "nle-inter-font"
-    );
-    await loadScriptOnce("https://cdn.tailwindcss.com", "nle-tailwind-v3");
-    await loadCssOnce(
-      "https://cdn.jsdelivr.net/npm/@phosphor-icons/web@2.1.2/src/regular/style.css",
-      "nle-phosphor-regular"
-    );
-    await loadCssOnce(
-      "https://cdn.jsdelivr.net/npm/@phosphor-icons/web@2.1.2/src/fill/style.css",
-      "nle-phosphor-fill"
-    );
+    // Independent fetches: start them all, wait for the slowest
+    await Promise.all([
+      loadCssOnce(
+        "https://fonts.googleapis.com/css2?family=Inter:wght@400;500;600&display=swap",
+        "nle-inter-font"
+      ),
+      loadScriptOnce("https://cdn.tailwindcss.com", "nle-tailwind-v3"),
+      loadCssOnce(
+        "https://cdn.jsdelivr.net/npm/@phosphor-icons/web@2.1.2/src/regular/style.css",
+        "nle-phosphor-regular"
+      ),
+      loadCssOnce(
+        "https://cdn.jsdelivr.net/npm/@phosphor-icons/web@2.1.2/src/fill/style.css",
+        "nle-phosphor-fill"
+      ),
+    ]);
   }}
 
   function mountUI() {{
@@ -548,6 +1490,7 @@ function() {{
     const projEl = $("#te-project-json textarea") || $("#te-project-json input") || $("#te-project-json");
     const cmdEl  = $("#te-cmd-json textarea") || $("#te-cmd-json input") || $("#te-cmd-json");
     const prevEl = $("#te-preview-uri textarea") || $("#te-preview-uri input") || $("#te-preview-uri");
+    const patchEl = $("#te-patch-json textarea") || $("#te-patch-json input") || $("#te-patch-json");
     if (!projEl || !cmdEl || !prevEl) return;
 
     const body = $("#app-body") || document.body;
@@ -556,6 +1499,8 @@ function() {{
     const ruler = $("#time-ruler");
     const playheadHead = $("#playhead-head");
     const playheadLine = $("#playhead-line");
+    if (playheadHead) playheadHead.style.willChange = "transform";
+    if (playheadLine) playheadLine.style.willChange = "transform";
     const mediaPool = $("#media-pool");
     const dragOverlay = $("#drag-overlay");
     const razorGuide = $("#razor-guide");
@@ -583,59 +1528,124 @@ function() {{
     let uiPlayheadF = 0;
     let rafId = null;
     let lastTs = performance.now();
-    let accumMs = 0;
+    // Elapsed time is accumulated in whole microseconds so long sessions
+    // step frames without floating-point drift
+    let accumUs = 0;
+    let frameUsFps = 0, frameUs = 40000;
     let lastBackendSyncTs = 0;
 
+    function frameDurationUs(fps) {{
+      if (fps !== frameUsFps) {{
+        frameUsFps = fps;
+        frameUs = Math.round(1000000 / fps);
+      }}
+      return frameUs;
+    }}
+
+    // Parsed project, re-parsed only when projEl's text actually changes
+    // (playback reads it every animation frame)
+    let cachedProjRaw = null;
+    let cachedProj = null;
+
+    function getProject() {{
+      const raw = projEl.value;
+      if (raw !== cachedProjRaw) {{
+        cachedProjRaw = raw;
+        cachedProj = safeParse(raw);
+      }}
+      return cachedProj;
+    }}
+
+    const maxEndCache = new WeakMap();
+    const mediaByIdCache = new WeakMap();
+    const clipsByIdCache = new WeakMap();
+
+    // id -> media item, built once per parsed project (playback looks up
+    // the clip's media on every frame)
+    function getMediaById(p) {{
+      let byId = mediaByIdCache.get(p);
+      if (!byId) {{
+        byId = new Map((p.media || []).map(m => [m.id, m]));
+        mediaByIdCache.set(p, byId);
+      }}
+      return byId;
+    }}
+
+    // id -> clip, same lifetime as getMediaById
+    function getClipsById(p) {{
+      let byId = clipsByIdCache.get(p);
+      if (!byId) {{
+        byId = new Map((p.clips || []).map(c => [c.id, c]));
+        clipsByIdCache.set(p, byId);
+      }}
+      return byId;
+    }}
+
     function getMaxEndFrame(p) {{
-      let maxEnd = 0;
+      let maxEnd = maxEndCache.get(p);
+      if (maxEnd !== undefined) return maxEnd;
+      maxEnd = 0;
       (p.clips || []).forEach(c => {{
         const dur = Math.max(1, (c.out_f - c.in_f));
         maxEnd = Math.max(maxEnd, (c.start_f || 0) + dur);
       }});
+      maxEndCache.set(p, maxEnd);
       return maxEnd;
     }}
 
     function getTopVisualClipAtFrame(p, frame) {{
-      const candidates = (p.clips || []).filter(c => (c.kind === "video" || c.kind === "image") && frame >= c.start_f && frame < c.start_f + (c.out_f - c.in_f));
-      if (!candidates.length) return null;
-      candidates.sort((a, b) => {{
-        const ta = parseInt(a.track_id.replace("V", "")) || 0;
-        const tb = parseInt(b.track_id.replace("V", "")) || 0;
-        return tb - ta;
-      }});
-      return candidates[0];
+      // Single pass top-1 selection (first clip wins on equal track priority)
+      let top = null;
+      let topPrio = -Infinity;
+      for (const c of (p.clips || [])) {{
+        if (c.kind !== "video" && c.kind !== "image") continue;
+        if (frame < c.start_f || frame >= c.start_f + (c.out_f - c.in_f)) continue;
+        const prio = parseInt(c.track_id.replace("V", "")) || 0;
+        if (prio > topPrio) {{
+          top = c;
+          topPrio = prio;
+        }}
+      }}
+      return top;
+    }}
+
+    // Style writes that are skipped when the value is already in place
+    function setOpacity(el, value) {{
+      if (el.style.opacity !== value) el.style.opacity = value;
     }}
 
     function updatePlayheadUI(frame, p) {{
       const fps = p.fps || 25.0;
       const ppf = p.px_per_frame || 2.0;
-
       const tc = frameToTimecode(frame, fps);
-      if (mainTimecode) mainTimecode.innerText = tc;
-      if (rulerTimecode) rulerTimecode.innerText = tc;
-
       const playX = Math.max(0, Math.round(frame * ppf));
-      if (playheadHead) playheadHead.style.left = `${{playX}}px`;
-      if (playheadLine) playheadLine.style.left = `${{playX + 160}}px`;
+
+      // Writes only from here on (textContent does not query layout the
+      // way innerText does); transform-only so the playhead never relayouts
+      if (mainTimecode) mainTimecode.textContent = tc;
+      if (rulerTimecode) rulerTimecode.textContent = tc;
+      if (playheadHead) playheadHead.style.transform = `translateX(${{playX}}px)`;
+      if (playheadLine) playheadLine.style.transform = `translateX(${{playX + 160}}px)`;
     }}
 
+    // Returns the visual clip under the frame so callers need not look it up again
     function updateProgramMonitor(p, frame, isPlaying) {{
-      if (!programVideo || !programPreview) return;
       const clip = getTopVisualClipAtFrame(p, frame);
+      if (!programVideo || !programPreview) return clip;
       
       if (!clip) {{
-        programVideo.pause();
-        programVideo.style.opacity = "0";
-        programPreview.style.opacity = "0";
-        return;
+        if (!programVideo.paused) programVideo.pause();
+        setOpacity(programVideo, "0");
+        setOpacity(programPreview, "0");
+        return clip;
       }}
       
-      const media = p.media.find(m => m.id === clip.media_id);
-      if (!media) return;
+      const media = getMediaById(p).get(clip.media_id);
+      if (!media) return clip;
 
       if (clip.kind === "video" && media.url) {{
-        programPreview.style.opacity = "0";
-        programVideo.style.opacity = "1";
+        setOpacity(programPreview, "0");
+        setOpacity(programVideo, "1");
         
         const targetUrl = new URL(media.url, window.location.origin).href;
         if (programVideo.src !== targetUrl) {{
@@ -656,10 +1666,11 @@ function() {{
           programVideo.pause();
         }}
       }} else {{
-        programVideo.pause();
-        programVideo.style.opacity = "0";
-        programPreview.style.opacity = "1";
+        if (!programVideo.paused) programVideo.pause();
+        setOpacity(programVideo, "0");
+        setOpacity(programPreview, "1");
       }}
+      return clip;
     }}
 
     function playbackLoop(ts) {{
@@ -668,18 +1679,17 @@ function() {{
 
       const dt = ts - lastTs;
       lastTs = ts;
-      accumMs += Math.min(dt, 100);
+      accumUs += Math.round(Math.min(dt, 100) * 1000);
 
-      const p = safeParse(projEl.value);
+      const p = getProject();
       if (!p) return;
 
-      const fps = p.fps || 25.0;
-      const frameMs = 1000 / fps;
+      const stepUs = frameDurationUs(p.fps || 25.0);
       const maxEnd = getMaxEndFrame(p);
       let updated = false;
 
-      while (accumMs >= frameMs) {{
-        accumMs -= frameMs;
+      while (accumUs >= stepUs) {{
+        accumUs -= stepUs;
         if (uiPlayheadF < maxEnd) {{
           uiPlayheadF++;
           updated = true;
@@ -694,13 +1704,11 @@ function() {{
 
       if (updated) {{
         updatePlayheadUI(uiPlayheadF, p);
-        updateProgramMonitor(p, uiPlayheadF, true);
-
-        const activeClip = getTopVisualClipAtFrame(p, uiPlayheadF);
+        const activeClip = updateProgramMonitor(p, uiPlayheadF, true);
         if (!activeClip || activeClip.kind !== "video") {{
           if (ts - lastBackendSyncTs > 250) {{
             lastBackendSyncTs = ts;
-            sendCmd(cmdEl, {{ type: "PREVIEW_AT", frame: uiPlayheadF }});
+            requestPreviewAt(p, uiPlayheadF);
           }}
         }}
       }}
@@ -710,13 +1718,13 @@ function() {{
       playing = !playing;
       if (playing) {{
         if (btnPlay) btnPlay.classList.replace("ph-play", "ph-pause");
-        const p = safeParse(projEl.value);
+        const p = getProject();
         const maxEnd = p ? getMaxEndFrame(p) : 0;
         if (uiPlayheadF >= maxEnd && maxEnd > 0) {{
           uiPlayheadF = 0;
         }}
         lastTs = performance.now();
-        accumMs = 0;
+        accumUs = 0;
         if (p) updateProgramMonitor(p, uiPlayheadF, true);
         rafId = requestAnimationFrame(playbackLoop);
       }} else {{
@@ -733,7 +1741,7 @@ function() {{
       btnHome.addEventListener("click", () => {{
         if (playing) togglePlay();
         uiPlayheadF = 0;
-        const p = safeParse(projEl.value);
+        const p = getProject();
         if (p) {{
           updatePlayheadUI(uiPlayheadF, p);
           updateProgramMonitor(p, uiPlayheadF, false);
@@ -745,7 +1753,7 @@ function() {{
     if (btnEnd) {{
       btnEnd.addEventListener("click", () => {{
         if (playing) togglePlay();
-        const p = safeParse(projEl.value);
+        const p = getProject();
         if (p) {{
           uiPlayheadF = getMaxEndFrame(p);
           updatePlayheadUI(uiPlayheadF, p);
@@ -755,26 +1763,30 @@ function() {{
       }});
     }}
 
+    // One toast node over the program monitor; a new message restarts its timer
+    const toastEl = $("#nle-toast");
+    let toastTimer = 0;
+
+    function showToast(text) {{
+      if (!toastEl) return;
+      toastEl.textContent = text;
+      setOpacity(toastEl, "1");
+      clearTimeout(toastTimer);
+      toastTimer = setTimeout(() => setOpacity(toastEl, "0"), 2000);
+    }}
+
     if (btnScreenshot) {{
       btnScreenshot.addEventListener("click", () => {{
         if (playing) togglePlay();
         sendCmd(cmdEl, {{ type: "SCREENSHOT", frame: uiPlayheadF }});
-        const toast = document.createElement("div");
-        toast.innerText = "Screenshot captured! (Downloading...)";
-        toast.className = "absolute top-4 left-1/2 -translate-x-1/2 bg-[#2d8ceb]/90 text-white px-3 py-1 rounded text-xs shadow-lg z-50 transition-opacity duration-500 pointer-events-none";
-        const pm = $("#program-preview")?.parentElement;
-        if (pm) {{
-          pm.appendChild(toast);
-          setTimeout(() => toast.style.opacity = "0", 2000);
-          setTimeout(() => toast.remove(), 2500);
-        }}
+        showToast("Screenshot captured! (Downloading...)");
       }});
     }}
 
     document.addEventListener("keydown", (e) => {{
         if (e.target.tagName === "INPUT" || e.target.tagName === "TEXTAREA") return;
         if (e.key === "Backspace" || e.key === "Delete") {{
-            const p = safeParse(projEl.value);
+            const p = getProject();
             if (p && p.selected_clip_id) {{
                 sendCmd(cmdEl, {{ type: "DELETE_CLIP", clip_id: p.selected_clip_id }});
             }}
@@ -796,263 +1808,478 @@ function() {{
     function renderRulerMarks() {{
       const marks = $("#ruler-marks");
       if (!marks) return;
-      if (marks.dataset.built === "1") return;
+      const frag = document.createDocumentFragment();
       for (let i = 0; i < 30; i++) {{
         const span = document.createElement("span");
-        span.innerText = `00:00:${{String(i).padStart(2,"0")}}:00`;
-        marks.appendChild(span);
+        span.textContent = `00:00:${{pad2(i)}}:00`;
+        frag.appendChild(span);
+      }}
+      marks.appendChild(frag);
+    }}
+    renderRulerMarks();
+
+    // Keyed media reconciliation: mediaId -> card, patched in place across renders
+    const mediaEls = new Map();
+    let lastMediaSig = null;
+
+    function createMediaEl(item) {{
+      const el = document.createElement("div");
+      el.className = "w-24 flex flex-col gap-1 cursor-pointer p-1 rounded-sm hover:bg-[#2a2a2a] group";
+      el.draggable = true;
+      el.dataset.mediaId = item.id;
+
+      const isAudio = item.kind === "audio";
+      const isImage = item.kind === "image";
+      const icon = isAudio ? "ph-speaker-high" : isImage ? "ph-image" : "ph-film-strip";
+      const color = isAudio ? "text-[#339e66]" : "text-[#2d8ceb]";
+
+      el.innerHTML = `
+          <div class="relative w-full h-14 bg-black flex items-center justify-center overflow-hidden rounded-sm border border-[#333] group-hover:border-[#555]">
+            <i class="ph ${{icon}} text-2xl ${{color}} opacity-50"></i>
+            <div class="absolute bottom-0 right-0 bg-black/80 px-1 text-[9px] font-mono flex items-center gap-1 text-gray-300"></div>
+          </div>
+          <span class="text-[9px] text-gray-300 truncate px-1"></span>
+        `;
+      el._thumb = el.firstElementChild;
+      el._icon = el._thumb.querySelector("i");
+      el._dur = el._thumb.lastElementChild;
+      el._name = el.querySelector("span");
+      return el;
+    }}
+
+    function patchMediaEl(el, item, sprite) {{
+      const dur = (item.duration_s != null) ? `${{Number(item.duration_s).toFixed(1)}}s` : "00:00";
+      if (el._durText !== dur) {{
+        el._dur.textContent = dur;
+        el._durText = dur;
+      }}
+      if (el._nameText !== item.name) {{
+        el._name.textContent = item.name;
+        el._name.title = item.name;
+        el._nameText = item.name;
+      }}
+
+      // Thumbnail = one cell of the shared sprite sheet
+      const cell = (sprite && item.thumb_cell != null) ? item.thumb_cell : -1;
+      const thumbStyle = cell < 0 ? "" :
+        `background-image:url('${{sprite}}');background-repeat:no-repeat;` +
+        `background-position:-${{(cell % THUMB_SPRITE_COLS) * THUMB_W}}px -${{Math.floor(cell / THUMB_SPRITE_COLS) * THUMB_H}}px;`;
+      if (el._thumbStyle !== thumbStyle) {{
+        el._thumb.style.cssText = thumbStyle;
+        el._icon.style.display = cell < 0 ? "" : "none";
+        el._thumbStyle = thumbStyle;
       }}
-      marks.dataset.built = "1";
     }}
 
     function renderMediaPool(p) {{
       if (!mediaPool || !dragOverlay) return;
-      mediaPool.innerHTML = "";
-      mediaPool.appendChild(dragOverlay);
 
+      // Media is append-only in practice and every upload rebuilds the
+      // sprite, so count + last item + sprite identifies a pool state.
       const media = p.media || [];
+      const last = media[media.length - 1];
+      const sig = `${{media.length}}|${{last ? last.id + "|" + last.name : ""}}|${{p.thumb_sprite || ""}}`;
+      if (sig === lastMediaSig) return;
+      lastMediaSig = sig;
+
       const mc = $("#media-count");
-      if (mc) mc.innerText = `${{media.length}} item(s)`;
+      if (mc) mc.textContent = `${{media.length}} item(s)`;
+      dragOverlay.style.display = media.length > 0 ? "none" : "flex";
+
+      const seen = new Set();
+      if (dragOverlay.parentNode !== mediaPool) mediaPool.prepend(dragOverlay);
+      let cursor = dragOverlay.nextSibling;
+      // Cards past the last kept one (a fresh upload) go in with one append
+      const tail = document.createDocumentFragment();
+      for (const item of media) {{
+        seen.add(item.id);
+        let el = mediaEls.get(item.id);
+        if (!el) {{
+          el = createMediaEl(item);
+          mediaEls.set(item.id, el);
+        }}
+        patchMediaEl(el, item, p.thumb_sprite);
+        if (el === cursor) cursor = cursor.nextSibling;
+        else if (cursor) mediaPool.insertBefore(el, cursor);
+        else tail.appendChild(el);
+      }}
+      if (tail.firstChild) mediaPool.appendChild(tail);
 
-      if (media.length > 0) dragOverlay.style.display = "none";
-      else dragOverlay.style.display = "flex";
+      for (const [id, el] of mediaEls) {{
+        if (!seen.has(id)) {{
+          el.remove();
+          mediaEls.delete(id);
+        }}
+      }}
+    }}
 
-      media.forEach(item => {{
-        const el = document.createElement("div");
-        el.className = "w-24 flex flex-col gap-1 cursor-pointer p-1 rounded-sm hover:bg-[#2a2a2a] group";
-        el.draggable = true;
-        el.dataset.mediaId = item.id;
+    if (mediaPool) {{
+      mediaPool.addEventListener("dragstart", (e) => {{
+        const el = e.target.closest("[data-media-id]");
+        if (!el) return;
+        e.dataTransfer.setData("application/x-wan2gp-media-id", el.dataset.mediaId);
+        e.dataTransfer.setData("text/plain", el.dataset.mediaId);
+        e.dataTransfer.effectAllowed = "copy";
+      }});
+    }}
 
-        const isAudio = item.kind === "audio";
-        const isImage = item.kind === "image";
-        const icon = isAudio ? "ph-speaker-high" : isImage ? "ph-image" : "ph-film-strip";
-        const color = isAudio ? "text-[#339e66]" : "text-[#2d8ceb]";
-        const dur = (item.duration_s != null) ? `${{Number(item.duration_s).toFixed(1)}}s` : "00:00";
+    // Keyed clip reconciliation: clipId -> element, patched in place across renders
+    const clipEls = new Map();
 
-        el.innerHTML = `
-          <div class="relative w-full h-14 bg-black flex items-center justify-center overflow-hidden rounded-sm border border-[#333] group-hover:border-[#555]">
-            <i class="ph ${{icon}} text-2xl ${{color}} opacity-50"></i>
-            <div class="absolute bottom-0 right-0 bg-black/80 px-1 text-[9px] font-mono flex items-center gap-1 text-gray-300">
-              ${{dur}}
-            </div>
-          </div>
-          <span class="text-[9px] text-gray-300 truncate px-1" title="${{item.name}}">${{item.name}}</span>
+    function createClipEl(clipId) {{
+      const clipEl = document.createElement("div");
+      clipEl.dataset.clipId = clipId;
+      clipEl.innerHTML = `
+          <div class="absolute left-0 top-0 bottom-0 w-2 cursor-col-resize hover:bg-white/30 z-20" data-handle="IN"></div>
+          <span class="text-white text-[10px] truncate whitespace-nowrap drop-shadow-md pointer-events-none select-none px-2"></span>
+          <div class="absolute right-0 top-0 bottom-0 w-2 cursor-col-resize hover:bg-white/30 z-20" data-handle="OUT"></div>
         `;
+      clipEl._label = clipEl.querySelector("span");
 
-        el.addEventListener("dragstart", (e) => {{
-          e.dataTransfer.setData("application/x-wan2gp-media-id", item.id);
-          e.dataTransfer.setData("text/plain", item.id);
-          e.dataTransfer.effectAllowed = "copy";
-        }});
-
-        mediaPool.appendChild(el);
-      }});
+      return clipEl;
     }}
 
-    function renderTimeline(p) {{
-      renderRulerMarks();
+    const trackEls = new Map(
+      [...document.querySelectorAll(".track[data-track]")].map(t => [t.dataset.track, t]));
+    let lastLayout = null;  // the clips/media arrays, fps and zoom the DOM was laid out for
 
+    function renderTimeline(p, mediaById) {{
       const fps = p.fps || 25.0;
       const ppf = p.px_per_frame || 2.0;
-      
-      updatePlayheadUI(uiPlayheadF, p);
+      const clips = p.clips || [];
+
+      // Playhead-only updates (SET_PLAYHEAD patches, playback) leave the
+      // clip layout alone; the caller moves the playhead itself. A parse or a
+      // clip patch always brings a new clips array, so references suffice.
+      if (lastLayout && lastLayout.clips === p.clips && lastLayout.media === p.media
+          && lastLayout.fps === fps && lastLayout.ppf === ppf) return;
+      lastLayout = {{ clips: p.clips, media: p.media, fps, ppf }};
 
       const seqDurEl = $("#sequence-duration");
       if (seqDurEl) {{
-        seqDurEl.innerText = frameToTimecode(getMaxEndFrame(p), fps);
+        seqDurEl.textContent = frameToTimecode(getMaxEndFrame(p), fps);
       }}
 
-      document.querySelectorAll(".track").forEach(track => track.innerHTML = "");
-
-      const clips = p.clips || [];
+      const seen = new Set();
       clips.forEach(c => {{
-        const track = document.querySelector(`.track[data-track="${{c.track_id}}"]`);
+        const track = trackEls.get(c.track_id);
         if (!track) return;
+        seen.add(c.id);
 
         const durF = Math.max(1, (c.out_f - c.in_f));
         const leftPx = Math.max(0, Math.round((c.start_f || 0) * ppf));
         const widthPx = Math.max(6, Math.round(durF * ppf));
 
-        const clipEl = document.createElement("div");
-        clipEl.className = `clip ${{c.kind}} z-10`;
-        clipEl.style.left = `${{leftPx}}px`;
-        clipEl.style.width = `${{widthPx}}px`;
-        clipEl.dataset.clipId = c.id;
+        let clipEl = clipEls.get(c.id);
+        if (!clipEl) {{
+          clipEl = createClipEl(c.id);
+          clipEls.set(c.id, clipEl);
+        }}
+        clipEl._leftPx = leftPx;
+        clipEl._widthPx = widthPx;
+        clipEl._durF = durF;
+        clipEl._ppf = ppf;
+
+        const cls = `clip ${{c.kind}} z-10`;
+        if (clipEl.className !== cls) clipEl.className = cls;
+        // Leave the clip being dragged where the pointer put it; otherwise
+        // only touch style when the rendered geometry actually changed.
+        if (!ui.dragging || ui.dragging.clipId !== c.id) {{
+          if (clipEl._styleLeft !== leftPx) {{
+            clipEl.style.left = `${{leftPx}}px`;
+            clipEl._styleLeft = leftPx;
+          }}
+          if (clipEl._styleWidth !== widthPx) {{
+            clipEl.style.width = `${{widthPx}}px`;
+            clipEl._styleWidth = widthPx;
+          }}
+        }}
+        const m = mediaById.get(c.media_id);
+        const label = (m && m.name) || c.id;
+        if (clipEl._label.textContent !== label) clipEl._label.textContent = label;
 
-        clipEl.innerHTML = `
-          <div class="absolute left-0 top-0 bottom-0 w-2 cursor-col-resize hover:bg-white/30 z-20" data-handle="IN"></div>
-          <span class="text-white text-[10px] truncate whitespace-nowrap drop-shadow-md pointer-events-none select-none px-2">
-            ${{(findMediaName(p, c.media_id) || c.id)}}
-          </span>
-          <div class="absolute right-0 top-0 bottom-0 w-2 cursor-col-resize hover:bg-white/30 z-20" data-handle="OUT"></div>
-        `;
+        if (clipEl.parentElement !== track) track.appendChild(clipEl);
+      }});
 
-        clipEl.addEventListener("pointerdown", (e) => {{
-          if (playing) togglePlay();
-          e.stopPropagation();
-          sendCmd(cmdEl, {{ type: "SELECT_CLIP", clip_id: c.id }});
-
-          const handle = e.target.dataset.handle;
-
-          if (ui.activeTool === "selection") {{
-            ui.dragging = {{
-              clipId: c.id,
-              type: handle ? `trim_${{handle.toLowerCase()}}` : 'move',
-              startX: e.clientX,
-              startLeftPx: leftPx,
-              startWidthPx: widthPx,
-            }};
-            clipEl.style.zIndex = "50";
-            clipEl.setPointerCapture(e.pointerId);
-          }} else if (ui.activeTool === "razor") {{
-            const rect = clipEl.getBoundingClientRect();
-            const cutPx = e.clientX - rect.left;
-            if (cutPx < 5 || cutPx > widthPx - 5) return;
-            const cutOffF = Math.max(1, Math.min(durF - 1, Math.round(cutPx / ppf)));
-            sendCmd(cmdEl, {{ type: "RAZOR_CUT", clip_id: c.id, cut_offset_f: cutOffF }});
-            if (razorGuide) razorGuide.style.display = "none";
-          }}
-        }});
+      for (const [clipId, clipEl] of clipEls) {{
+        if (!seen.has(clipId)) {{
+          clipEl.remove();
+          clipEls.delete(clipId);
+        }}
+      }}
+    }}
 
-        clipEl.addEventListener("pointermove", (e) => {{
-          if (!ui.dragging || ui.dragging.clipId !== c.id) return;
-          e.stopPropagation();
+    // Viewport rect of the tracks container. Reading it after a style write
+    // forces a layout, so it is read once and only dropped when a resize or
+    // any scroll (captured, so #timeline-container counts) can have moved it.
+    let tracksRect = null;
 
-          const dx = e.clientX - ui.dragging.startX;
+    function getTracksRect() {{
+      if (!tracksRect) tracksRect = tracksContent.getBoundingClientRect();
+      return tracksRect;
+    }}
 
-          if (ui.dragging.type === 'move') {{
-            const newLeft = Math.max(0, ui.dragging.startLeftPx + dx);
-            clipEl.style.left = `${{newLeft}}px`;
-          }} else if (ui.dragging.type === 'trim_in') {{
-            let newLeft = Math.max(0, ui.dragging.startLeftPx + dx);
-            let newWidth = ui.dragging.startWidthPx - (newLeft - ui.dragging.startLeftPx);
-            if (newWidth < 6) {{
-                newWidth = 6;
-                newLeft = ui.dragging.startLeftPx + ui.dragging.startWidthPx - 6;
-            }}
-            clipEl.style.left = `${{newLeft}}px`;
-            clipEl.style.width = `${{newWidth}}px`;
-          }} else if (ui.dragging.type === 'trim_out') {{
-            const newWidth = Math.max(6, ui.dragging.startWidthPx + dx);
-            clipEl.style.width = `${{newWidth}}px`;
-          }}
-        }});
+    if (tracksContent) {{
+      const dropTracksRect = () => {{ tracksRect = null; }};
+      window.addEventListener("resize", dropTracksRect, {{ passive: true }});
+      document.addEventListener("scroll", dropTracksRect, {{ capture: true, passive: true }});
+      if (window.ResizeObserver) new ResizeObserver(dropTracksRect).observe(tracksContent);
+    }}
+
+    // Drop media onto tracks, delegated from the tracks container
+    if (tracksContent) {{
+      tracksContent.addEventListener("dragover", (e) => {{
+        const track = e.target.closest(".track");
+        if (!track) return;
+        e.preventDefault();
+        track.classList.add("drag-over");
+      }});
+      tracksContent.addEventListener("dragleave", (e) => {{
+        const track = e.target.closest(".track");
+        if (!track || track.contains(e.relatedTarget)) return;
+        e.preventDefault();
+        track.classList.remove("drag-over");
+      }});
+      tracksContent.addEventListener("drop", (e) => {{
+        const track = e.target.closest(".track");
+        if (!track) return;
+        e.preventDefault();
+        track.classList.remove("drag-over");
+        
+        const mediaId = e.dataTransfer.getData("application/x-wan2gp-media-id") || e.dataTransfer.getData("text/plain");
+        if (!mediaId) return;
+
+        const p = getProject();
+        const ppf = (p && p.px_per_frame) || 2.0;
+        const timelineContainer = $("#timeline-container");
+        const scrollLeft = timelineContainer ? timelineContainer.scrollLeft : 0;
+        // Tracks span the container's full width, so they share its left edge
+        const x = (e.clientX - getTracksRect().left) + scrollLeft;
+        const startF = Math.max(0, Math.round(x / ppf));
+        const trackId = track.dataset.track || "V1";
+        
+        sendCmd(cmdEl, {{ type: "ADD_CLIP", media_id: mediaId, track_id: trackId, start_f: startF }});
+      }});
+    }}
 
-        clipEl.addEventListener("pointerup", (e) => {{
-          if (!ui.dragging || ui.dragging.clipId !== c.id) return;
-          e.stopPropagation();
-          clipEl.releasePointerCapture(e.pointerId);
+    // Clip select / drag / trim / razor, delegated from the tracks container.
+    // Geometry comes from the element expandos set by renderTimeline
+    // (_leftPx, _widthPx, _durF, _ppf).
+    if (tracksContent) {{
+      tracksContent.addEventListener("pointerdown", (e) => {{
+        const clipEl = e.target.closest(".clip");
+        if (!clipEl) return;
+        const clipId = clipEl.dataset.clipId;
+        if (playing) togglePlay();
+        e.stopPropagation();
+        sendCmd(cmdEl, {{ type: "SELECT_CLIP", clip_id: clipId }});
+
+        const handle = e.target.dataset.handle;
+
+        if (ui.activeTool === "selection") {{
+          ui.dragging = {{
+            clipId: clipId,
+            type: handle ? `trim_${{handle.toLowerCase()}}` : 'move',
+            startX: e.clientX,
+            startLeftPx: clipEl._leftPx,
+            startWidthPx: clipEl._widthPx,
+          }};
+          clipEl.style.zIndex = "50";
+          // Moves are previewed with a compositor-only transform
+          if (!handle) clipEl.style.willChange = "transform";
+          clipEl.setPointerCapture(e.pointerId);
+        }} else if (ui.activeTool === "razor") {{
+          const rect = clipEl.getBoundingClientRect();
+          const cutPx = e.clientX - rect.left;
+          if (cutPx < 5 || cutPx > clipEl._widthPx - 5) return;
+          const cutOffF = Math.max(1, Math.min(clipEl._durF - 1, Math.round(cutPx / clipEl._ppf)));
+          sendCmd(cmdEl, {{ type: "RAZOR_CUT", clip_id: clipId, cut_offset_f: cutOffF }});
+          if (razorGuide) razorGuide.style.display = "none";
+        }}
+      }});
 
-          if (ui.dragging.type === 'move') {{
-            const dx = e.clientX - ui.dragging.startX;
-            const newLeft = Math.max(0, ui.dragging.startLeftPx + dx);
-            const newStartF = Math.max(0, Math.round(newLeft / ppf));
-            
-            let newTrack = null;
-            clipEl.style.visibility = 'hidden';
-            const elUnder = document.elementFromPoint(e.clientX, e.clientY);
-            clipEl.style.visibility = '';
-            
-            if (elUnder) {{
-              const trackEl = elUnder.closest(".track");
-              if (trackEl && trackEl.dataset.track) newTrack = trackEl.dataset.track;
-            }}
-            sendCmd(cmdEl, {{ type: "MOVE_CLIP", clip_id: c.id, start_f: newStartF, track_id: newTrack }});
-          }} else if (ui.dragging.type === 'trim_in') {{
-            const dx = e.clientX - ui.dragging.startX;
-            let newLeft = Math.max(0, ui.dragging.startLeftPx + dx);
-            let newWidth = ui.dragging.startWidthPx - (newLeft - ui.dragging.startLeftPx);
-            if (newWidth < 6) newLeft = ui.dragging.startLeftPx + ui.dragging.startWidthPx - 6;
-            
-            const newStartF = Math.max(0, Math.round(newLeft / ppf));
-            sendCmd(cmdEl, {{ type: "TRIM_CLIP", clip_id: c.id, edge: "IN", new_frame: newStartF }});
-          }} else if (ui.dragging.type === 'trim_out') {{
-            const dx = e.clientX - ui.dragging.startX;
-            const newWidth = Math.max(6, ui.dragging.startWidthPx + dx);
-            const newEndPx = ui.dragging.startLeftPx + newWidth;
-            const newEndF = Math.round(newEndPx / ppf);
-            
-            sendCmd(cmdEl, {{ type: "TRIM_CLIP", clip_id: c.id, edge: "OUT", new_frame: newEndF }});
+      // Pointers can report several moves per frame: keep the latest x and
+      // write the drag preview once per animation frame.
+      let dragX = null;
+      let dragRafPending = false;
+
+      function applyDragPreview() {{
+        dragRafPending = false;
+        if (!ui.dragging || dragX === null) return;
+        const clipEl = clipEls.get(ui.dragging.clipId);
+        if (!clipEl) return;
+
+        const dx = dragX - ui.dragging.startX;
+
+        if (ui.dragging.type === 'move') {{
+          const newLeft = Math.max(0, ui.dragging.startLeftPx + dx);
+          clipEl.style.transform = `translateX(${{newLeft - ui.dragging.startLeftPx}}px)`;
+        }} else if (ui.dragging.type === 'trim_in') {{
+          let newLeft = Math.max(0, ui.dragging.startLeftPx + dx);
+          let newWidth = ui.dragging.startWidthPx - (newLeft - ui.dragging.startLeftPx);
+          if (newWidth < 6) {{
+              newWidth = 6;
+              newLeft = ui.dragging.startLeftPx + ui.dragging.startWidthPx - 6;
           }}
+          clipEl.style.left = `${{newLeft}}px`;
+          clipEl.style.width = `${{newWidth}}px`;
+        }} else if (ui.dragging.type === 'trim_out') {{
+          const newWidth = Math.max(6, ui.dragging.startWidthPx + dx);
+          clipEl.style.width = `${{newWidth}}px`;
+        }}
+      }}
 
-          clipEl.style.zIndex = "10";
-          ui.dragging = null;
-        }});
-
-        track.appendChild(clipEl);
+      tracksContent.addEventListener("pointermove", (e) => {{
+        if (!ui.dragging) return;
+        e.stopPropagation();
+        dragX = e.clientX;
+        if (dragRafPending) return;
+        dragRafPending = true;
+        requestAnimationFrame(applyDragPreview);
       }});
 
-      // Enable drop media onto tracks
-      document.querySelectorAll(".track").forEach(track => {{
-        track.ondragover = (e) => {{
-          e.preventDefault();
-          track.classList.add("drag-over");
-        }};
-        track.ondragleave = (e) => {{
-          e.preventDefault();
-          track.classList.remove("drag-over");
-        }};
-        track.ondrop = (e) => {{
-          e.preventDefault();
-          track.classList.remove("drag-over");
-          
-          const mediaId = e.dataTransfer.getData("application/x-wan2gp-media-id") || e.dataTransfer.getData("text/plain");
-          if (!mediaId) return;
+      tracksContent.addEventListener("pointerup", (e) => {{
+        if (!ui.dragging) return;
+        const clipId = ui.dragging.clipId;
+        const clipEl = clipEls.get(clipId);
+        if (!clipEl) {{
+          ui.dragging = null;
+          return;
+        }}
+        e.stopPropagation();
+        clipEl.releasePointerCapture(e.pointerId);
+        const ppf = clipEl._ppf;
+
+        if (ui.dragging.type === 'move') {{
+          const dx = e.clientX - ui.dragging.startX;
+          const newLeft = Math.max(0, ui.dragging.startLeftPx + dx);
+          const newStartF = Math.max(0, Math.round(newLeft / ppf));
+
+          // Read first: the track under the pointer, looking through the
+          // dragged clip itself (no hide/show style toggling around the hit test)
+          let newTrack = null;
+          const elUnder = document.elementsFromPoint(e.clientX, e.clientY).find(el => !clipEl.contains(el));
+          if (elUnder) {{
+            const trackEl = elUnder.closest(".track");
+            if (trackEl && trackEl.dataset.track) newTrack = trackEl.dataset.track;
+          }}
 
-          const timelineContainer = $("#timeline-container");
-          const scrollLeft = timelineContainer ? timelineContainer.scrollLeft : 0;
-          const rect = track.getBoundingClientRect();
+          // Then write: commit the position to left until the backend re-render lands
+          clipEl.style.transform = "";
+          clipEl.style.willChange = "";
+          clipEl.style.left = `${{newLeft}}px`;
+          sendCmd(cmdEl, {{ type: "MOVE_CLIP", clip_id: clipId, start_f: newStartF, track_id: newTrack }});
+        }} else if (ui.dragging.type === 'trim_in') {{
+          const dx = e.clientX - ui.dragging.startX;
+          let newLeft = Math.max(0, ui.dragging.startLeftPx + dx);
+          let newWidth = ui.dragging.startWidthPx - (newLeft - ui.dragging.startLeftPx);
+          if (newWidth < 6) newLeft = ui.dragging.startLeftPx + ui.dragging.startWidthPx - 6;
           
-          const x = (e.clientX - rect.left) + scrollLeft;
-          const startF = Math.max(0, Math.round(x / ppf));
-          const trackId = track.dataset.track || "V1";
+          const newStartF = Math.max(0, Math.round(newLeft / ppf));
+          sendCmd(cmdEl, {{ type: "TRIM_CLIP", clip_id: clipId, edge: "IN", new_frame: newStartF }});
+        }} else if (ui.dragging.type === 'trim_out') {{
+          const dx = e.clientX - ui.dragging.startX;
+          const newWidth = Math.max(6, ui.dragging.startWidthPx + dx);
+          const newEndPx = ui.dragging.startLeftPx + newWidth;
+          const newEndF = Math.round(newEndPx / ppf);
           
-          sendCmd(cmdEl, {{ type: "ADD_CLIP", media_id: mediaId, track_id: trackId, start_f: startF }});
-        }};
+          sendCmd(cmdEl, {{ type: "TRIM_CLIP", clip_id: clipId, edge: "OUT", new_frame: newEndF }});
+        }}
+
+        clipEl.style.zIndex = "10";
+        // The drag wrote left/width directly; force the next render to restore them
+        clipEl._styleLeft = clipEl._styleWidth = -1;
+        lastLayout = null;
+        ui.dragging = null;
+        dragX = null;
       }});
-      
-      // Razor guide over tracks container
-      const tracksContent = $("#tracks-content");
-      if (tracksContent) {{
-        tracksContent.addEventListener("mousemove", (e) => {{
-            if (ui.activeTool !== "razor" || ui.dragging) return;
-            if (!razorGuide) return;
-            const tracksRect = tracksContent.getBoundingClientRect();
-            const relX = e.clientX - tracksRect.left;
-            razorGuide.style.display = "block";
-            razorGuide.style.left = `${{relX}}px`;
-        }});
-        tracksContent.addEventListener("mouseleave", () => {{
-            if (razorGuide) razorGuide.style.display = "none";
-        }});
+
+      // A cancelled touch/pen gesture, or capture taken by the browser, ends
+      // the drag without a pointerup: put the clip back and send nothing.
+      // (After a normal pointerup ui.dragging is already cleared.)
+      function cancelDrag() {{
+        if (!ui.dragging) return;
+        const clipEl = clipEls.get(ui.dragging.clipId);
+        ui.dragging = null;
+        dragX = null;
+        if (clipEl) {{
+          clipEl.style.transform = "";
+          clipEl.style.willChange = "";
+          clipEl.style.zIndex = "10";
+          clipEl._styleLeft = clipEl._styleWidth = -1;
+        }}
+        lastLayout = null;
+        const p = getProject();
+        if (p) renderAll(p);
       }}
+      tracksContent.addEventListener("pointercancel", cancelDrag);
+      tracksContent.addEventListener("lostpointercapture", cancelDrag);
     }}
 
-    function findMediaName(p, mediaId) {{
-      const m = (p.media || []).find(x => x.id === mediaId);
-      return m ? m.name : "";
+    // Razor guide over tracks container (bound once)
+    if (tracksContent) {{
+      tracksContent.addEventListener("pointermove", (e) => {{
+          if (ui.activeTool !== "razor" || ui.dragging) return;
+          if (!razorGuide) return;
+          const relX = e.clientX - getTracksRect().left;
+          if (razorGuide.style.display !== "block") razorGuide.style.display = "block";
+          razorGuide.style.left = `${{relX}}px`;
+      }});
+      tracksContent.addEventListener("pointerleave", () => {{
+          if (razorGuide) razorGuide.style.display = "none";
+      }});
     }}
 
-    function renderEffectControls(p) {{
-      if (!effectPanel) return;
-      const c = (p.clips || []).find(x => x.id === p.selected_clip_id);
-      if (!c) {{
-        effectPanel.innerHTML = `<span class="text-gray-500">(Select a clip to view FFmpeg parameters)</span>`;
-        return;
-      }}
-      const m = (p.media || []).find(x => x.id === c.media_id);
-      const name = m ? m.name : c.id;
+    // The panel skeleton is built once; renders only switch between the
+    // empty and clip states and patch the clip name when it changes.
+    let effectEls = null;
+
+    function buildEffectPanel() {{
       effectPanel.innerHTML = `
-        <div class="text-white font-medium mb-2 border-b border-[#333] pb-1">${{name}}</div>
-        <div class="flex flex-col gap-1 mb-3">
-          <div class="flex justify-between text-gray-400"><span>Scale</span> <span class="text-blue-400">100.0</span></div>
-          <div class="flex justify-between text-gray-400"><span>Position</span> <span class="text-blue-400">960.0, 540.0</span></div>
-          <div class="flex justify-between text-gray-400"><span>Opacity</span> <span class="text-blue-400">100%</span></div>
-        </div>
-        <div class="text-gray-500 mt-2 text-[9px] font-mono bg-[#111] p-2 rounded border border-[#222]">
-          > ffmpeg -i input -vf "scale=iw*1:ih*1" output
+        <span class="text-gray-500">(Select a clip to view FFmpeg parameters)</span>
+        <div class="flex flex-col gap-2" style="display: none;">
+          <div class="text-white font-medium mb-2 border-b border-[#333] pb-1"></div>
+          <div class="flex flex-col gap-1 mb-3">
+            <div class="flex justify-between text-gray-400"><span>Scale</span> <span class="text-blue-400">100.0</span></div>
+            <div class="flex justify-between text-gray-400"><span>Position</span> <span class="text-blue-400">960.0, 540.0</span></div>
+            <div class="flex justify-between text-gray-400"><span>Opacity</span> <span class="text-blue-400">100%</span></div>
+          </div>
+          <div class="text-gray-500 mt-2 text-[9px] font-mono bg-[#111] p-2 rounded border border-[#222]">
+            > ffmpeg -i input -vf "scale=iw*1:ih*1" output
+          </div>
         </div>
       `;
+      const [empty, details] = effectPanel.children;
+      return {{ empty, details, name: details.firstElementChild, hasClip: false, nameText: null }};
+    }}
+
+    function renderEffectControls(p, mediaById) {{
+      if (!effectPanel) return;
+      if (!effectEls) effectEls = buildEffectPanel();
+
+      const c = getClipsById(p).get(p.selected_clip_id);
+      const hasClip = !!c;
+      if (hasClip !== effectEls.hasClip) {{
+        effectEls.empty.style.display = hasClip ? "none" : "";
+        effectEls.details.style.display = hasClip ? "" : "none";
+        effectEls.hasClip = hasClip;
+      }}
+      if (!c) return;
+
+      const m = mediaById.get(c.media_id);
+      const name = m ? m.name : c.id;
+      if (name !== effectEls.nameText) {{
+        effectEls.name.textContent = name;
+        effectEls.nameText = name;
+      }}
+    }}
+
+    function renderAll(p) {{
+      // One id -> media lookup per payload instead of a scan per clip
+      const mediaById = getMediaById(p);
+      renderMediaPool(p);
+      renderTimeline(p, mediaById);
+      renderEffectControls(p, mediaById);
     }}
 
     if (toolsPanel) {{
@@ -1072,7 +2299,7 @@ function() {{
     if (ruler) {{
       ruler.addEventListener("pointerdown", (e) => {{
         if (playing) togglePlay();
-        const p = safeParse(projEl.value);
+        const p = getProject();
         if (!p) return;
         
         ruler.setPointerCapture(e.pointerId);
@@ -1084,22 +2311,43 @@ function() {{
           uiPlayheadF = Math.max(0, Math.round(x / ppf));
           updatePlayheadUI(uiPlayheadF, p);
           updateProgramMonitor(p, uiPlayheadF, false);
-          sendCmd(cmdEl, {{ type: "PREVIEW_AT", frame: uiPlayheadF }});
+          requestPreviewAt(p, uiPlayheadF);
         }};
 
         setFromX(e.clientX - rect.left);
 
-        const move = (ev) => setFromX(ev.clientX - rect.left);
+        // Pointers can report far more moves than frames; apply only the
+        // latest position once per animation frame.
+        let pendingX = null;
+        let rafPending = false;
+        const move = (ev) => {{
+          pendingX = ev.clientX - rect.left;
+          if (rafPending) return;
+          rafPending = true;
+          requestAnimationFrame(() => {{
+            rafPending = false;
+            if (pendingX === null) return;
+            setFromX(pendingX);
+            pendingX = null;
+          }});
+        }};
         const up = (ev) => {{
+          if (pendingX !== null) {{
+            uiPlayheadF = Math.max(0, Math.round(pendingX / ppf));
+            updatePlayheadUI(uiPlayheadF, p);
+            pendingX = null;
+          }}
           ruler.removeEventListener("pointermove", move);
           ruler.removeEventListener("pointerup", up);
           ruler.removeEventListener("pointercancel", up);
-          ruler.releasePointerCapture(ev.pointerId);
+          ruler.removeEventListener("lostpointercapture", up);
+          if (ruler.hasPointerCapture(ev.pointerId)) ruler.releasePointerCapture(ev.pointerId);
           sendCmd(cmdEl, {{ type: "SET_PLAYHEAD", frame: uiPlayheadF }});
         }};
         ruler.addEventListener("pointermove", move);
         ruler.addEventListener("pointerup", up);
         ruler.addEventListener("pointercancel", up);
+        ruler.addEventListener("lostpointercapture", up);
       }});
     }}
 
@@ -1119,111 +2367,316 @@ function() {{
       }});
     }}
 
-    // State sync loop
-    let lastProjRaw = null;
-    let lastPrevUri = null;
-    let lastScreenshotHref = null;
+    // Backend pushes can arrive in bursts (e.g. while scrubbing); render the
+    // latest project at most once per animation frame.
+    let renderPending = false;
+    let lastRenderedRaw = null;
+
+    function scheduleRender() {{
+      if (renderPending) return;
+      renderPending = true;
+      requestAnimationFrame(() => {{
+        renderPending = false;
+        const raw = projEl.value;
+        if (raw === lastRenderedRaw) return;
+        lastRenderedRaw = raw;
+        const p = getProject();
+        if (p) syncPreviewCacheSig(p);
+        // Update from backend json only if not currently managing playhead smoothly via RAF
+        if (!p || playing) return;
+        uiPlayheadF = p.playhead_f || 0;
+        renderAll(p);
+        updatePlayheadUI(uiPlayheadF, p);
+        updateProgramMonitor(p, uiPlayheadF, false);
+      }});
+    }}
 
-    setInterval(() => {{
-      // Update from backend json only if not currently managing playhead smoothly via RAF
-      if (projEl && projEl.value !== lastProjRaw) {{
-        lastProjRaw = projEl.value;
-        const p = safeParse(lastProjRaw);
-        if (p && !playing) {{
-          uiPlayheadF = p.playhead_f || 0;
-          renderMediaPool(p);
-          renderTimeline(p);
-          renderEffectControls(p);
-          updateProgramMonitor(p, uiPlayheadF, false);
-        }}
-      }}
+    // Decode preview frames off-screen and swap them in once ready, so the
+    // monitor never shows a half-decoded image. The token drops stale frames
+    // that finish decoding after a newer one was requested.
+    const previewPreloader = new Image();
+    let previewToken = 0;
+
+    function showPreviewFrame(uri) {{
+      const token = ++previewToken;
+      const swap = () => {{
+        if (token !== previewToken) return;
+        programPreview.src = uri;
+        programPreview.style.opacity = "1";
+        if (programVideo) programVideo.style.opacity = "0";
+      }};
+      previewPreloader.src = uri;
+      previewPreloader.decode().then(swap, swap);
+    }}
+
+    function applyPreviewUri(p, uri) {{
+      const activeClip = p ? getTopVisualClipAtFrame(p, uiPlayheadF) : null;
       
-      if (prevEl && prevEl.value !== lastPrevUri) {{
-        lastPrevUri = prevEl.value;
-        const uri = lastPrevUri || "";
-        const p = safeParse(projEl.value);
-        const activeClip = p ? getTopVisualClipAtFrame(p, uiPlayheadF) : null;
-        
-        // Only update preview img if we aren't currently showing a video
-        if (activeClip && activeClip.kind === "video") {{
-            // do nothing, video handles itself
-        }} else if (programPreview) {{
-          if (uri.startsWith("data:image/")) {{
-            programPreview.src = uri;
-            programPreview.style.opacity = "1";
-            if (programVideo) programVideo.style.opacity = "0";
-          }} else {{
-            programPreview.src = "";
-            programPreview.style.opacity = "0";
-          }}
+      // Only update preview img if we aren't currently showing a video
+      if (activeClip && activeClip.kind === "video") {{
+          // do nothing, video handles itself
+      }} else if (programPreview) {{
+        if (uri) {{
+          showPreviewFrame(uri);
+        }} else {{
+          previewToken++;
+          programPreview.src = "";
+          programPreview.style.opacity = "0";
         }}
       }}
+    }}
 
-      // Check for invisible automatic download (screenshot requested from backend)
-      const fileLink = document.querySelector("#te-screenshot-file a");
-      if (fileLink && fileLink.href && fileLink.href !== lastScreenshotHref) {{
-        lastScreenshotHref = fileLink.href;
-        fileLink.click();
+    // Frame -> preview URL LRU for PREVIEW_AT, so scrubbing or looping over
+    // frames seen before skips the backend. The backend tags those URLs with
+    // "#f=<frame>"; the cache is dropped whenever the clip layout changes.
+    const PREVIEW_URL_CACHE_SIZE = 64;
+    const previewUrlCache = new Map();
+    let previewCacheClips = null;
+    let previewCacheFps = null;
+
+    function syncPreviewCacheSig(p) {{
+      // Clip edits always install a new clips array (see applyProjectPatch)
+      if (p.clips === previewCacheClips && p.fps === previewCacheFps) return;
+      previewCacheClips = p.clips;
+      previewCacheFps = p.fps;
+      previewUrlCache.clear();
+    }}
+
+    function rememberPreview(frame, uri) {{
+      if (!Number.isFinite(frame)) return;
+      previewUrlCache.delete(frame);
+      previewUrlCache.set(frame, uri);
+      if (previewUrlCache.size > PREVIEW_URL_CACHE_SIZE) {{
+        previewUrlCache.delete(previewUrlCache.keys().next().value);
       }}
+    }}
+
+    // At most one PREVIEW_AT in flight: while waiting, only the newest
+    // requested frame is remembered and sent once the answer lands (or after
+    // a timeout, in case the answer did not change prevEl).
+    let previewInFlight = null;
+    let previewQueued = null;
+    let previewTimer = 0;
+
+    function previewSettled() {{
+      clearTimeout(previewTimer);
+      previewInFlight = null;
+      if (previewQueued === null) return;
+      const frame = previewQueued;
+      previewQueued = null;
+      requestPreviewAt(getProject(), frame);
+    }}
 
-    }}, 100);
+    function requestPreviewAt(p, frame) {{
+      const uri = previewUrlCache.get(frame);
+      if (uri !== undefined) {{
+        previewUrlCache.delete(frame);
+        previewUrlCache.set(frame, uri);
+        applyPreviewUri(p, uri);
+        return;
+      }}
+      if (previewInFlight !== null) {{
+        previewQueued = frame !== previewInFlight ? frame : null;
+        return;
+      }}
+      previewInFlight = frame;
+      previewTimer = setTimeout(previewSettled, 1000);
+      sendCmd(cmdEl, {{ type: "PREVIEW_AT", frame: frame }});
+    }}
 
-    // Initial render bindings (fallback)
-    projEl.addEventListener("input", () => {{
-      const p = safeParse(projEl.value);
+    // Small commands (SET_PLAYHEAD, SELECT_CLIP) come back as a field patch
+    // instead of the whole project. Apply it to our copy and write that back
+    // into projEl so Gradio sends the patched project with the next command.
+    function applyProjectPatch(raw) {{
+      const patch = safeParse(raw);
+      if (!patch || !patch.set) return;
+      const p = getProject();
       if (!p) return;
-      if (!playing) {{
-        uiPlayheadF = p.playhead_f || 0;
-        renderMediaPool(p);
-        renderTimeline(p);
-        renderEffectControls(p);
-        updateProgramMonitor(p, uiPlayheadF, false);
+      const edited = patch.clips || [];
+      if (Object.keys(patch.set).length === 0 && edited.length === 0) {{
+        // Sent only for a drag the backend left unchanged (dropped where it
+        // started or clamped back): re-apply the layout over the drag preview
+        lastLayout = null;
+        renderAll(p);
+        return;
       }}
-    }});
+      Object.assign(p, patch.set);
+      if (edited.length) {{
+        // Only the edited clips travel: swap them in by id so a patch from a
+        // command sent with an older copy can't revert unrelated edits
+        const editedById = new Map(edited.map(c => [c.id, c]));
+        p.clips = (p.clips || []).map(c => editedById.get(c.id) || c);
+      }}
+      maxEndCache.delete(p);
+      mediaByIdCache.delete(p);
+      clipsByIdCache.delete(p);
+      // The patched object stays the cached parse of the new text
+      projEl.value = cachedProjRaw = JSON.stringify(p);
+      projEl.dispatchEvent(new Event("input", {{ bubbles: true }}));
+    }}
+
+    // Backend pushes: each hidden box's Gradio .change handler re-broadcasts
+    // its new value as a DOM event (see bridge_event_js), so nothing polls.
+    // "input" on projEl covers the writes made from this script.
+    let lastPatchRaw = patchEl ? patchEl.value : null;
+    let lastPrevUri = null;
+    let lastScreenshotHref = null;
+
+    function onPatch(raw) {{
+      if (raw === lastPatchRaw) return;
+      lastPatchRaw = raw;
+      applyProjectPatch(raw);
+    }}
+
+    function onPreviewUri(raw) {{
+      if (raw === lastPrevUri) return;
+      lastPrevUri = raw;
+      const uri = raw || "";
+      const tag = uri.lastIndexOf("#f=");
+      if (tag >= 0) rememberPreview(parseInt(uri.slice(tag + 3), 10), uri);
+      applyPreviewUri(getProject(), uri);
+      if (previewInFlight !== null) previewSettled();
+    }}
+
+    document.addEventListener("nle:project", scheduleRender);
+    projEl.addEventListener("input", scheduleRender);
+    document.addEventListener("nle:patch", (e) => onPatch(e.detail ?? (patchEl ? patchEl.value : "")));
+    document.addEventListener("nle:preview", (e) => onPreviewUri(e.detail ?? prevEl.value));
+
+    // Screenshots: gr.File renders a new download link for each file it
+    // receives; follow it once (invisible automatic download)
+    const screenshotHost = $("#te-screenshot-file");
+    if (screenshotHost) {{
+      new MutationObserver(() => {{
+        const fileLink = screenshotHost.querySelector("a");
+        if (fileLink && fileLink.href && fileLink.href !== lastScreenshotHref) {{
+          lastScreenshotHref = fileLink.href;
+          fileLink.click();
+        }}
+      }}).observe(screenshotHost, {{ childList: true, subtree: true, attributes: true, attributeFilter: ["href"] }});
+    }}
 
-    const p0 = safeParse(projEl.value);
+    lastRenderedRaw = projEl.value;
+    const p0 = getProject();
     if (p0) {{
+      syncPreviewCacheSig(p0);
       uiPlayheadF = p0.playhead_f || 0;
       setCursor();
-      renderMediaPool(p0);
-      renderTimeline(p0);
-      renderEffectControls(p0);
+      renderAll(p0);
+      updatePlayheadUI(uiPlayheadF, p0);
       updateProgramMonitor(p0, uiPlayheadF, false);
     }}
+    onPreviewUri(prevEl.value);
+  }}
+
+  // The editor sits in a tab that is usually hidden at page load, so the
+  // CDN assets (Tailwind runtime, fonts, icon CSS) wait until the mount is
+  // actually on screen. One shared promise, so concurrent init() calls all
+  // wait for the same load instead of racing a half-loaded script.
+  let assetsReady = null;
+
+  function whenVisible(el) {{
+    return new Promise((resolve) => {{
+      if (!window.IntersectionObserver) return resolve();
+      const io = new IntersectionObserver((entries) => {{
+        if (!entries.some(e => e.isIntersecting)) return;
+        io.disconnect();
+        resolve();
+      }});
+      io.observe(el);
+    }});
   }}
 
   async function init() {{
     const mountOk = mountUI();
     if (!mountOk) return;
 
-    await ensureAssets();
-
     const mount = document.getElementById("nle-mount");
+    if (!assetsReady) assetsReady = whenVisible(mount).then(ensureAssets);
+    await assetsReady;
+
     if (mount && mount.dataset.inited === "1") return;
     if (mount) mount.dataset.inited = "1";
 
     appInit();
+    // The observer only exists to catch the mount appearing (e.g. when the
+    // tab is first rendered); once the app is up it has nothing left to do.
+    obs.disconnect();
   }}
 
-  init();
-  const obs = new MutationObserver(() => init());
+  // Coalesce mutation bursts into one init() when the browser is idle
+  const whenIdle = window.requestIdleCallback
+    ? (cb) => window.requestIdleCallback(cb, {{ timeout: 200 }})
+    : (cb) => setTimeout(cb, 50);
+  let initScheduled = false;
+  const obs = new MutationObserver(() => {{
+    if (initScheduled) return;
+    initScheduled = true;
+    whenIdle(() => {{
+      initScheduled = false;
+      init();
+    }});
+  }});
   obs.observe(document.body, {{ childList: true, subtree: true }});
+  init();
 }}
 """
 
+
+def bridge_event_js(event_name: str) -> str:
+    """Client-only Gradio event handler that re-broadcasts a component update as a DOM event.
+
+    The component's value (when it is passed as the event input) travels as the event's detail.
+    """
+    return f"(value) => {{ document.dispatchEvent(new CustomEvent({json.dumps(event_name)}, {{ detail: value }})); }}"
+
+
+# =========================
+# Plugin
+# =========================
+class TimelineEditorPlugin(WAN2GPPlugin):
+    name = "Wan2GP Timeline Editor"
+
+    def setup_ui(self):
+        self.add_tab(
+            tab_id="timeline_editor_tab",
+            label="Timeline",
+            component_constructor=self.create_ui,
+            position=1,
+        )
+
+        # Wan2GP injects requested globals as attributes via setattr(plugin, name, fn)
+        self.request_global("get_unique_id")
+        self.request_global("has_video_file_extension")
+        self.request_global("has_image_file_extension")
+        self.request_global("has_audio_file_extension")
+        self.request_global("get_video_info")   # returns (fps,w,h,frame_count)
+        self.request_global("get_video_frame")  # supports return_PIL=True
+
+        self.request_component("state")
+
+    def create_ui(self):
         with gr.Blocks() as root:
-            gr.HTML(mount_container)
+            gr.HTML(MOUNT_CONTAINER_HTML)
 
             # Hidden bridges inside a specific group
             with gr.Group(elem_id="nle-bridge-host"):
                 project_json = gr.Textbox(value=dumps_project(default_project()), elem_id="te-project-json")
                 cmd_json = gr.Textbox(value="", elem_id="te-cmd-json")
                 preview_uri = gr.Textbox(value="", elem_id="te-preview-uri")
+                project_patch_json = gr.Textbox(value="", elem_id="te-patch-json")
                 uploader = gr.File(label="Uploader", file_count="multiple", type="filepath", elem_id="nle-upload")
                 screenshot_file = gr.File(label="Screenshot", elem_id="te-screenshot-file")
 
-            root.load(fn=None, js=js)
+            root.load(fn=None, js=UI_JS)
+            # Backend writes to the hidden boxes are pushed to the UI rather
+            # than discovered by polling their values
+            project_json.change(fn=None, js=bridge_event_js("nle:project"))
+            project_patch_json.change(fn=None, inputs=[project_patch_json], js=bridge_event_js("nle:patch"))
+            preview_uri.change(fn=None, inputs=[preview_uri], js=bridge_event_js("nle:preview"))
 
+            # Kind only depends on the file extension, so memoize per path
+            @functools.lru_cache(maxsize=1024)
             def _detect_kind(path: str) -> str:
                 hv = getattr(self, "has_video_file_extension", None)
                 hi = getattr(self, "has_image_file_extension", None)
@@ -1236,31 +2689,37 @@ function() {{
                     return "audio"
                 return "video"
 
+            def _video_info(info_fn, path: str) -> Optional[List[float]]:
+                # (fps, width, height, frame_count) as plain floats so it can be persisted
+                info = info_fn(path)
+                if not isinstance(info, (list, tuple)) or len(info) < 4:
+                    return None
+                return [float(v or 0) for v in info[:4]]
+
             def _uid() -> str:
                 uid_fn = getattr(self, "get_unique_id", None)
                 if callable(uid_fn):
                     return str(uid_fn())
-                return f"id_{abs(hash(os.urandom(16)))}"
+                return new_id("id")
 
             def on_upload(files, raw_proj: str):
-                p = loads_project(raw_proj)
                 if not files:
-                    return raw_proj, compute_preview_uri(self, p)
+                    return gr.update(), gr.update()
+                p = loads_project(raw_proj)
 
-                for f in files:
-                    path = getattr(f, "name", None) or str(f)
-                    name = os.path.basename(path)
-                    kind = _detect_kind(path)
+                paths = [getattr(f, "name", None) or str(f) for f in files]
 
-                    item = MediaItem(id=_uid(), name=name, path=path, kind=kind)
+                def probe_one(path: str) -> MediaItem:
+                    kind = _detect_kind(path)
+                    item = MediaItem(id="", name=os.path.basename(path), path=path, kind=kind)
 
                     try:
-                        item.url = "/gradio_api/file=" + urllib.parse.quote(path)
+                        item.url = gradio_file_url(path)
                         
                         if kind == "video":
                             info_fn = getattr(self, "get_video_info", None)
                             if callable(info_fn):
-                                info = info_fn(path)
+                                info = cached_probe("video_info", path, functools.partial(_video_info, info_fn))
                                 if isinstance(info, (list, tuple)) and len(info) >= 4:
                                     fps, _w, _h, frame_count = info[:4]
                                     item.fps = float(fps) if fps else None
@@ -1282,213 +2741,59 @@ function() {{
                                 item.frames = int(round(item.duration_s * p.fps))
                     except Exception:
                         pass
+                    return item
 
-                    p.media.append(item)
+                # Probes are subprocess/I-O bound: run them side by side, keep file order
+                if len(paths) <= 1:
+                    items = [probe_one(path) for path in paths]
+                else:
+                    items = list(probe_executor().map(probe_one, paths))
+
+                for item in items:
+                    item.id = _uid()
+                add_media(p, items)
+
+                build_thumb_sprite(self, p)
+                flush_probe_cache()
 
                 raw2 = dumps_project(p)
                 prev = compute_preview_uri(self, p)
                 return raw2, prev
 
             def on_cmd(raw_cmd: str, raw_proj: str):
-                p = loads_project(raw_proj)
-                screenshot_path = gr.update()
-
-                if not raw_cmd:
-                    return raw_proj, compute_preview_uri(self, p), "", screenshot_path
+                # cmd_json is left as-is: with trigger_mode="always_last" a command
+                # written while this one runs is picked up from it afterwards.
+                cmd_out = gr.update()
 
+                # Empty, malformed or unknown commands change nothing: answer before parsing the project
                 try:
-                    cmd = json.loads(raw_cmd)
+                    cmd = loads_json(raw_cmd) if raw_cmd else None
                 except Exception:
-                    return raw_proj, compute_preview_uri(self, p), "", screenshot_path
-
-                t = cmd.get("type")
+                    cmd = None
+                handler = _CMD_TABLE.get(cmd.get("type")) if isinstance(cmd, dict) else None
+                if handler is None:
+                    return gr.update(), gr.update(), cmd_out, gr.update(), gr.update()
 
-                if t == "SET_PLAYHEAD":
-                    p.playhead_f = max(0, int(cmd.get("frame", 0)))
-                
-                elif t == "PREVIEW_AT":
-                    frame = max(0, int(cmd.get("frame", 0)))
-                    original_f = p.playhead_f
-                    p.playhead_f = frame
-                    prev = compute_preview_uri(self, p)
-                    p.playhead_f = original_f
-                    # Return original raw_proj unmodified so client state is not forced to rewind!
-                    return raw_proj, prev, "", screenshot_path
-
-                elif t == "SCREENSHOT":
-                    frame = cmd.get("frame")
-                    if frame is not None:
-                        p.playhead_f = max(0, int(frame))
-                        
-                    img = _get_preview_image(self, p)
-                    if img:
-                        tmp_fd, tmp_path = tempfile.mkstemp(suffix=".png", prefix="screenshot_")
-                        os.close(tmp_fd)
-                        img.save(tmp_path, "PNG")
-                        screenshot_path = tmp_path
-
-                elif t == "SELECT_CLIP":
-                    p.selected_clip_id = cmd.get("clip_id")
-
-                elif t == "DELETE_CLIP":
-                    cid = cmd.get("clip_id")
-                    target = find_clip(p, cid)
-                    if target:
-                        if target.link_id:
-                            p.clips = [c for c in p.clips if c.link_id != target.link_id]
-                        else:
-                            p.clips = [c for c in p.clips if c.id != target.id]
-                        if p.selected_clip_id == cid:
-                            p.selected_clip_id = None
-
-                elif t == "ADD_CLIP":
-                    media_id = cmd.get("media_id")
-                    track_id = cmd.get("track_id", "V1")
-                    start_f = max(0, int(cmd.get("start_f", 0)))
-
-                    m = find_media(p, media_id)
-                    if m:
-                        # Validation logic
-                        if track_id.startswith("A") and m.kind != "audio" and not (m.kind == "video" and m.has_audio):
-                            pass  # Disallow images or video-without-audio on Audio tracks
-                        elif track_id.startswith("V") and m.kind == "audio":
-                            pass  # Disallow Audio strictly on Video tracks
-                        else:
-                            if m.frames is not None:
-                                dur_f = max(1, int(m.frames))
-                                if m.kind == "video":
-                                    dur_f = min(dur_f, int(round(p.fps * 5.0)))
-                            else:
-                                dur_f = int(round(p.fps * 2.0))
-
-                            clip_id = f"c_{abs(hash(os.urandom(8)))}"
-                            clips_to_add = []
-
-                            if m.kind == "video" and track_id.startswith("V") and m.has_audio:
-                                link_id = f"l_{abs(hash(os.urandom(8)))}"
-                                cv = Clip(
-                                    id=clip_id, media_id=m.id, track_id=track_id, start_f=start_f,
-                                    in_f=0, out_f=dur_f, kind="video", link_id=link_id
-                                )
-                                ca_id = f"c_{abs(hash(os.urandom(8)))}"
-                                ca = Clip(
-                                    id=ca_id, media_id=m.id, track_id="A1", start_f=start_f,
-                                    in_f=0, out_f=dur_f, kind="audio", link_id=link_id
-                                )
-                                clips_to_add.extend([cv, ca])
-                            elif m.kind == "video" and track_id.startswith("A") and m.has_audio:
-                                c = Clip(
-                                    id=clip_id, media_id=m.id, track_id=track_id, start_f=start_f,
-                                    in_f=0, out_f=dur_f, kind="audio", link_id=None
-                                )
-                                clips_to_add.append(c)
-                            else:
-                                c = Clip(
-                                    id=clip_id, media_id=m.id, track_id=track_id, start_f=start_f,
-                                    in_f=0, out_f=dur_f, kind=m.kind, link_id=None
-                                )
-                                clips_to_add.append(c)
-
-                            p.clips.extend(clips_to_add)
-                            p.selected_clip_id = clip_id
-
-                elif t == "TRIM_CLIP":
-                    cid = cmd.get("clip_id")
-                    edge = cmd.get("edge") # "IN" or "OUT"
-                    new_frame = max(0, int(cmd.get("new_frame", 0)))
-                    
-                    target = find_clip(p, cid)
-                    if target:
-                        link_group = [c for c in p.clips if c.link_id == target.link_id] if target.link_id else [target]
-                        
-                        if edge == "IN":
-                            delta_start = new_frame - target.start_f
-                            for c in link_group:
-                                # Keep at least 1 frame duration
-                                max_delta = (c.out_f - c.in_f) - 1
-                                actual_delta = min(delta_start, max_delta)
-                                # Cannot trim before start of media file
-                                if c.in_f + actual_delta < 0:
-                                    actual_delta = -c.in_f
-                                # Cannot place before timeline 0
-                                if c.start_f + actual_delta < 0:
-                                    actual_delta = -c.start_f
-                                    
-                                c.start_f += actual_delta
-                                c.in_f += actual_delta
-                                
-                        elif edge == "OUT":
-                            new_dur = new_frame - target.start_f
-                            for c in link_group:
-                                actual_dur = max(1, new_dur)
-                                m = find_media(p, c.media_id)
-                                if m and m.frames is not None:
-                                    max_dur = m.frames - c.in_f
-                                    actual_dur = min(actual_dur, max_dur)
-                                c.out_f = c.in_f + actual_dur
-
-                elif t == "MOVE_CLIP":
-                    cid = cmd.get("clip_id")
-                    new_start = max(0, int(cmd.get("start_f", 0)))
-                    new_track = cmd.get("track_id")
-
-                    target = find_clip(p, cid)
-                    if target:
-                        delta = new_start - target.start_f
-                        if target.link_id:
-                            linked_clips = [c for c in p.clips if c.link_id == target.link_id]
-                            # Cap delta if moving left out of bounds
-                            min_start = min(c.start_f for c in linked_clips)
-                            if min_start + delta < 0:
-                                delta = -min_start
-                                
-                            for c in linked_clips:
-                                c.start_f += delta
-                                if c.id == cid and new_track:
-                                    if new_track.startswith("V") and c.kind in ("video", "image"):
-                                        c.track_id = new_track
-                                    elif new_track.startswith("A") and c.kind == "audio":
-                                        c.track_id = new_track
-                        else:
-                            target.start_f += delta
-                            if new_track:
-                                if new_track.startswith("V") and target.kind in ("video", "image"):
-                                    target.track_id = new_track
-                                elif new_track.startswith("A") and target.kind == "audio":
-                                    target.track_id = new_track
-
-                elif t == "RAZOR_CUT":
-                    cid = cmd.get("clip_id")
-                    cut_off = int(cmd.get("cut_offset_f", 0))
-
-                    target = find_clip(p, cid)
-                    if target:
-                        dur = clip_duration_frames(target)
-                        cut_off = max(1, min(dur - 1, cut_off))
-
-                        link_group = [c for c in p.clips if c.link_id == target.link_id] if target.link_id else [target]
-                        new_link_id = f"l_{abs(hash(os.urandom(8)))}" if target.link_id else None
-
-                        for c in link_group:
-                            second_id = f"{c.id}_b"
-                            second = Clip(
-                                id=second_id,
-                                media_id=c.media_id,
-                                track_id=c.track_id,
-                                start_f=c.start_f + cut_off,
-                                in_f=c.in_f + cut_off,
-                                out_f=c.out_f,
-                                kind=c.kind,
-                                link_id=new_link_id
-                            )
-                            c.out_f = c.in_f + cut_off
-                            p.clips.append(second)
-                            
-                        p.selected_clip_id = target.id
+                p = loads_project(raw_proj)
+                res = handler(self, p, cmd)
+                screenshot_path = res.screenshot if res.screenshot is not None else gr.update()
+
+                if res.preview is not None:
+                    return gr.update(), res.preview, cmd_out, screenshot_path, gr.update()
+                if res.patch is not None or res.clips is not None:
+                    changes = res.patch or {}
+                    # Only playhead and clip edits can change the previewed frame
+                    prev = compute_preview_uri(self, p) if res.clips or "playhead_f" in changes else gr.update()
+                    return gr.update(), prev, cmd_out, screenshot_path, project_patch(res.clips, **changes)
+                if not res.changed:
+                    # The client's copy is still current: nothing to re-send. An
+                    # empty patch only goes out to undo an optimistic drag preview.
+                    reset = project_patch() if res.reset_layout else gr.update()
+                    return gr.update(), gr.update(), cmd_out, screenshot_path, reset
 
                 raw2 = dumps_project(p)
                 prev = compute_preview_uri(self, p)
-                return raw2, prev, "", screenshot_path
+                return raw2, prev, cmd_out, screenshot_path, gr.update()
 
             uploader.upload(
                 on_upload,
@@ -1499,7 +2804,10 @@ function() {{
             cmd_json.input(
                 on_cmd,
                 inputs=[cmd_json, project_json],
-                outputs=[project_json, preview_uri, cmd_json, screenshot_file],
+                outputs=[project_json, preview_uri, cmd_json, screenshot_file, project_patch_json],
+                # Last request wins: commands arriving while one is running
+                # collapse into the newest instead of being dropped or queued.
+                trigger_mode="always_last",
             )
 
         return root